@@ -1,74 +1,116 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import os
 import shutil
-import requests
-import base64
+import threading
 import altair as alt
-import plotly.express as px
 from datetime import date, timedelta
+import price_cache
+import telemetry
+from attribution import ATTRIBUTION_WINDOWS, AttributionEngine
+from downsample import downsample_frame
+from gti_engine import NORMALIZATION_WINDOWS, GTIAccumulator, compute_gti, load_weights, normalization_lookback, normalize_windows
+from gti_bootstrap import bootstrap_bands
+from github_sync import GitHubSync
+from gti_stream import ReplaySource, StreamingGTI, YahooMinuteSource, session_date
 from events import show_events_table
-from index_analysis import plot_world_map, build_results, attach_color_classes
+from index_analysis import plot_world_map, plot_world_map_animation, build_results, attach_color_classes
 
 st.set_page_config(page_title="Geopolitical Tension Index", layout="wide")
 st.title("Geopolitical Tension Index (GTI)")
+telemetry.start_run()
 
 # ---------- Config ----------
 WEIGHTS_FILE = "stocks_weights.csv"
+CHART_POINTS = 1000  # أقصى عدد نقاط في رسم الـ GTI (LTTB للمدى الطويل)
 BACKUP_FILE = "backup_weights.csv"
-LOG_FILE    = "logs.txt"
 GITHUB_TOKEN = st.secrets.get("GITHUB_TOKEN") if "GITHUB_TOKEN" in st.secrets else os.environ.get("GITHUB_TOKEN")
 GITHUB_REPO  = st.secrets.get("GITHUB_REPO")  if "GITHUB_REPO"  in st.secrets else os.environ.get("GITHUB_REPO")
 
 # ---------- Helpers ----------
 def log_action(msg):
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(msg + "\n")
+    telemetry.log_event(msg)
 
 def read_weights(path=WEIGHTS_FILE):
-    if not os.path.exists(path):
-        st.error(f"Weights file not found: {path}")
+    try:
+        return load_weights(path)
+    except ValueError as e:
+        st.error(str(e))
         st.stop()
-    df = pd.read_csv(path)
-    df.columns = [c.strip() for c in df.columns]
-    cols_lower = {c.lower(): c for c in df.columns}
-    for col in ["symbol","weight","positive"]:
-        if col not in cols_lower:
-            st.error(f"Column '{col}' missing in CSV.")
-            st.stop()
-    df = df.rename(columns={cols_lower["symbol"]:"symbol", 
-                            cols_lower["weight"]:"weight", 
-                            cols_lower["positive"]:"positive"})
-    if "full_name" not in df.columns:
-        df["full_name"] = df["symbol"]
-    df["weight"] = pd.to_numeric(df["weight"], errors="coerce").fillna(0.0)
-    df["positive"] = df["positive"].astype(int)
-    return df
 
 def save_weights_local(df, path=WEIGHTS_FILE):
     df.to_csv(path, index=False)
 
-def push_to_github(content_str, path_in_repo, commit_message="Update weights"):
+def _log_sync_result(path, state, msg):
+    log_action(f"GitHub sync {path}: {state} - {msg}")
+
+@st.cache_resource(show_spinner=False)
+def get_github_sync():
+    """worker واحد للعملية كلها، فالتعديلات من أي session بتتجمع في نفس الطابور"""
     if not GITHUB_TOKEN or not GITHUB_REPO:
+        return None
+    return GitHubSync(GITHUB_TOKEN, GITHUB_REPO, on_result=_log_sync_result)
+
+def push_to_github(content_str, path_in_repo, commit_message="Update weights"):
+    """بيحط الملف في طابور الرفع وبيرجع فورًا؛ الحالة من show_sync_status"""
+    sync = get_github_sync()
+    if sync is None:
         return False, "GitHub token or repo not configured"
+    sync.submit(path_in_repo, content_str, commit_message)
+    return True, "Queued"
 
-    api_url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{path_in_repo}"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}", "Accept": "application/vnd.github.v3+json"}
-    r = requests.get(api_url, headers=headers, params={"ref": "main"})
-    content_b64 = base64.b64encode(content_str.encode()).decode()
-    payload = {"message": commit_message, "content": content_b64, "branch": "main"}
-    if r.status_code == 200:
-        payload["sha"] = r.json().get("sha")
-    r2 = requests.put(api_url, headers=headers, json=payload)
-    if r2.status_code in (200, 201): return True, "OK"
-    st.error(f"GitHub API Response ({r2.status_code}): {r2.text}")
-    return False, f"GitHub API error: {r2.status_code} {r2.text}"
+def show_sync_status(path_in_repo=WEIGHTS_FILE):
+    sync = get_github_sync()
+    if sync is None:
+        return
+    status = sync.status(path_in_repo)
+    icons = {"idle": "⚪", "pending": "🕒", "pushing": "⏫", "ok": "✅", "error": "❌"}
+    st.caption(f"{icons.get(status['state'], '')} GitHub: {status['state']} {status['message']}")
+
+@st.cache_resource(show_spinner=False)
+def get_shared_prices():
+    """كاش الأسعار المشترك بين كل الـ sessions + تحديث في الخلفية بعد إغلاق البورصات"""
+    return price_cache.start_shared(lambda: price_cache.default_universe(WEIGHTS_FILE))
 
-@st.cache_data(show_spinner=False)
 def get_price_data(symbols, start, end):
-    raw = yf.download(symbols, start=start, end=end, auto_adjust=True, progress=False)["Close"].dropna(how="all", axis=1)
-    return raw
+    get_shared_prices()
+    return price_cache.load_close(symbols, start, end).dropna(how="all", axis=1)
+
+@st.cache_data(show_spinner=False)
+def get_gti_bands(prices, weights):
+    return bootstrap_bands(prices, weights)
+
+@st.cache_data(show_spinner=False)
+def get_attribution(history, weights):
+    engine = AttributionEngine.from_prices(history, weights)
+    return {w: (engine.contributions(w), engine.correlation(w)) for w in engine.windows}
+
+@st.cache_resource(show_spinner=False)
+def _live_streams():
+    """symbols -> (يوم الجلسة, stream) للعملية كلها"""
+    return {}, threading.Lock()
+
+def get_stream(symbols: tuple):
+    """
+    GTI لحظي واحد للعملية كلها: بيكمّل من آخر إغلاق يومي (مقياس سنة).
+    مع كل جلسة جديدة بيتعمل stream جديد (أساس = إغلاق امبارح) والقديم بيقف.
+    لو مفيش session فاتحة الـ live mode (مفيش قراءة STREAM_IDLE ثانية) طلبات Yahoo بتقف.
+    GTI_STREAM_REPLAY=ticks.csv بيشغّل ملف مسجّل بدل Yahoo.
+    """
+    streams, lock = _live_streams()
+    day = session_date()
+    with lock:
+        current = streams.get(symbols)
+        if current is not None and current[0] == day:
+            return current[1]
+        if current is not None:
+            current[1].stop()
+        daily = price_cache.load_close(list(symbols), day - timedelta(days=365), day).dropna(how="all", axis=1)
+        stream = StreamingGTI.from_accumulator(GTIAccumulator.from_prices(daily, read_weights(WEIGHTS_FILE)))
+        replay = os.environ.get("GTI_STREAM_REPLAY")
+        stream.start(ReplaySource(replay, speed=60) if replay else YahooMinuteSource(stream.symbols, day=day, active=stream.active))
+        streams[symbols] = (day, stream)
+        return stream
 
 def gti_color(val):
     try: v = float(val)
@@ -94,29 +136,39 @@ def restore_defaults():
     st.session_state.end_date   = default_end
     st.session_state.today_date = default_end
 st.sidebar.button("Restore Default Dates", on_click=restore_defaults)
+normalization = st.sidebar.selectbox(
+    "Normalization window", ["full", *NORMALIZATION_WINDOWS],
+    format_func=lambda k: "Selected range" if k == "full" else k,
+    help="Rolling windows score each day against its own trailing window, so values do not move when the start date changes.",
+)
+show_bands = st.sidebar.checkbox("Show confidence bands", value=False, disabled=normalization != "full")
+animate_map = st.sidebar.checkbox("Animate world map", value=False, help="Play the map over the selected range")
+live_mode = st.sidebar.checkbox("Intraday (live)", value=False, help="Minute bars since the last daily close")
+debug_timings = st.sidebar.checkbox("Debug timings", value=False)
+telemetry.enable(debug_timings or telemetry.ENV_ENABLED)  # للـ session دي بس
 
 # ---------- Main ----------
 weights = read_weights(WEIGHTS_FILE)
 symbols = weights["symbol"].tolist()
 
-with st.spinner("Fetching price data..."):
-    prices = get_price_data(symbols, start_date, end_date)
-if prices is None or prices.empty:
+# بنجيب الأسعار من قبل البداية بأطول نافذة، فتغيير النافذة مجرد اختيار عمود من غير تحميل تاني
+fetch_start = start_date - timedelta(days=normalization_lookback())
+with st.spinner("Fetching price data..."), telemetry.span("get_price_data") as sp:
+    history = get_price_data(symbols, fetch_start, end_date)
+    sp.rows = history.size if history is not None else 0
+if history is None or history.empty:
+    st.error("No price data available.")
+    st.stop()
+prices = history[history.index >= pd.Timestamp(start_date)]
+if prices.empty:
     st.error("No price data available.")
     st.stop()
 
-returns = prices.pct_change(fill_method=None).dropna(how="all")
-available = [s for s in symbols if s in returns.columns]
-weights = weights[weights["symbol"].isin(available)].copy()
-returns = returns[available]
-total_weight = weights["weight"].sum()
-weighted = pd.DataFrame(index=returns.index)
-for _, row in weights.iterrows():
-    sign = 1 if int(row["positive"])==1 else -1
-    weighted[row["symbol"]] = returns[row["symbol"]] * (row["weight"]/total_weight) * sign
-index_series = weighted.sum(axis=1).cumsum()
-min_v, max_v = index_series.min(), index_series.max()
-index_pct = (index_series - min_v)/(max_v - min_v)*100 if max_v!=min_v else pd.Series(50.0,index=index_series.index)
+with telemetry.span("compute_gti", rows=history.size):
+    gti = compute_gti(history, weights)
+    gti_table = normalize_windows(gti.raw, start=start_date)
+weights = weights[weights["symbol"].isin(gti.contributions.columns)].copy()
+index_pct = gti_table[normalization].dropna()
 
 gti_today = float(index_pct.iloc[-1])
 color_hex = gti_color(gti_today)
@@ -128,8 +180,27 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# --- Intraday ---
+if live_mode:
+    with telemetry.span("intraday"):
+        stream = get_stream(tuple(symbols))
+        snap = stream.snapshot()
+        col_live, col_chart = st.columns([1, 3])
+        col_live.metric("Intraday GTI (1y scale)", f"{snap['value']:.2f}", f"{snap['move'] * 100:+.2f}% since close")
+        col_live.caption(f"{snap['symbols_live']}/{len(stream.symbols)} symbols live · last tick {snap['ts'] or '—'}")
+        if snap["error"]:
+            col_live.warning(snap["error"])
+        col_live.button("🔄 Refresh live")
+        live_hist = stream.history()
+        if len(live_hist):
+            col_chart.line_chart(live_hist.rename("GTI"), height=180)
+        live_symbol = col_live.selectbox("Symbol (intraday)", stream.symbols)
+        symbol_hist = stream.symbol_history(live_symbol)
+        if len(symbol_hist):
+            col_chart.line_chart(symbol_hist, height=140)
+
 # --- GTI Chart ---
-gti_df = pd.DataFrame({"Date": index_pct.index, "GTI": index_pct.values})
+gti_df = downsample_frame(pd.DataFrame({"Date": index_pct.index, "GTI": index_pct.values}), "Date", "GTI", CHART_POINTS)
 hover = alt.selection_point(fields=["Date"], nearest=True, on="mouseover", empty="none")
 line = alt.Chart(gti_df).mark_line(color="#4A90E2").encode(x="Date:T", y="GTI:Q")
 points = line.mark_circle(size=50).encode(opacity=alt.condition(hover, alt.value(1), alt.value(0))).add_params(hover)
@@ -137,14 +208,48 @@ text = line.mark_text(align="left", dx=10, dy=-10, fontSize=13, fontWeight="bold
     text=alt.condition(hover, alt.Text("GTI:Q", format=".2f"), alt.value("")),
     color=alt.condition(hover, alt.Color("GTI:Q", scale=alt.Scale(domain=[0,50,100], range=["green","orange","red"])), alt.value("transparent"))
 )
-chart = alt.layer(line, points, text).interactive()
-st.altair_chart(chart, use_container_width=True)
+layers = [line, points, text]
+if show_bands and normalization == "full":
+    with st.spinner("Resampling GTI paths..."):
+        bands_df = get_gti_bands(prices, weights).reset_index(names="Date")
+    bands_df = bands_df[bands_df["Date"].isin(gti_df["Date"])]
+    outer = alt.Chart(bands_df).mark_area(color="#4A90E2", opacity=0.15).encode(x="Date:T", y="p5:Q", y2="p95:Q")
+    inner = alt.Chart(bands_df).mark_area(color="#4A90E2", opacity=0.25).encode(x="Date:T", y="p25:Q", y2="p75:Q")
+    layers = [outer, inner] + layers
+with telemetry.span("gti_chart", rows=len(gti_df)):
+    chart = alt.layer(*layers).interactive()
+    st.altair_chart(chart, use_container_width=True)
+
+# --- GTI Drivers ---
+with st.expander("🔍 GTI drivers", expanded=False), telemetry.span("attribution"):
+    window = st.radio("Window (trading days)", ATTRIBUTION_WINDOWS, index=1, horizontal=True)
+    contrib, corr = get_attribution(history, weights)[window]
+    contrib = contrib.reset_index().merge(weights[["symbol", "full_name"]], on="symbol", how="left")
+    bars = alt.Chart(contrib).mark_bar().encode(
+        x=alt.X("contribution:Q", title="Contribution to last move"),
+        y=alt.Y("full_name:N", sort="-x", title=None),
+        color=alt.condition(alt.datum.contribution > 0, alt.value("#e74c3c"), alt.value("#2ecc71")),
+        tooltip=["symbol", alt.Tooltip("return:Q", format=".2%"), alt.Tooltip("risk_share:Q", format=".1%")],
+    )
+    st.altair_chart(bars, use_container_width=True)
+    st.dataframe(contrib.sort_values("risk_share", ascending=False), use_container_width=True, hide_index=True)
+    heat = corr.rename_axis("a").reset_index().melt(id_vars="a", var_name="b", value_name="corr")
+    st.altair_chart(alt.Chart(heat).mark_rect().encode(
+        x=alt.X("a:N", title=None), y=alt.Y("b:N", title=None),
+        color=alt.Color("corr:Q", scale=alt.Scale(domain=[-1, 0, 1], scheme="redblue", reverse=True)),
+        tooltip=["a", "b", alt.Tooltip("corr:Q", format=".2f")],
+    ), use_container_width=True)
 
 # --- World Map & Table ---
-fig = plot_world_map(start_date=start_date, end_date=end_date, today=today_date)
-st.plotly_chart(fig, use_container_width=True)
+with telemetry.span("world_map"):
+    if animate_map:
+        fig = plot_world_map_animation(start_date, end_date)
+    else:
+        fig = plot_world_map(start_date=start_date, end_date=end_date, today=today_date)
+    st.plotly_chart(fig, use_container_width=True)
 
-show_events_table(start_date, end_date)
+with telemetry.span("events_table"):
+    show_events_table(start_date, end_date)
 
 if 1>2:
     st.title("📊 مؤشر الأسواق العالمية - Global Map View")
@@ -172,11 +277,11 @@ if 1>2:
                 csv_text = edited.to_csv(index=False)
                 ok, msg = push_to_github(csv_text, WEIGHTS_FILE, commit_message="Update weights via app")
                 if ok:
-                    st.success("✅ Saved locally and pushed to GitHub")
-                    log_action("Save: Local + GitHub success")
+                    st.success("✅ Saved locally, GitHub commit queued")
+                    log_action("Save: Local + GitHub queued")
                 else:
-                    st.warning(f"⚠️ Saved locally. GitHub push failed: {msg}")
-                    log_action(f"Save: Local only. GitHub failed: {msg}")
+                    st.warning(f"⚠️ Saved locally. GitHub push skipped: {msg}")
+                    log_action(f"Save: Local only. GitHub skipped: {msg}")
             except Exception as e:
                 st.error(f"❌ Error while saving: {e}")
                 log_action(f"Save error: {e}")
@@ -193,13 +298,29 @@ if 1>2:
                     with open(BACKUP_FILE,"r",encoding="utf-8") as f: csv_text = f.read()
                     ok, msg = push_to_github(csv_text, WEIGHTS_FILE, commit_message="Restore weights from backup")
                     if ok:
-                        st.success("✅ Restored from backup and pushed to GitHub")
-                        log_action("Restore: Local + GitHub success")
+                        st.success("✅ Restored from backup, GitHub commit queued")
+                        log_action("Restore: Local + GitHub queued")
                     else:
-                        st.warning(f"⚠️ Restored locally. GitHub push failed: {msg}")
-                        log_action(f"Restore: Local only. GitHub failed: {msg}")
+                        st.warning(f"⚠️ Restored locally. GitHub push skipped: {msg}")
+                        log_action(f"Restore: Local only. GitHub skipped: {msg}")
             except Exception as e:
                 st.error(f"❌ Error while restoring: {e}")
                 log_action(f"Restore error: {e}")
             st.rerun()
-    
+
+# ---------- GitHub Sync Status ----------
+# برّه بلوك الحفظ عشان حالة الرفع تبان لأي session (حتى لو التعديل جه من session تانية)
+with st.sidebar:
+    show_sync_status(WEIGHTS_FILE)
+
+# ---------- Debug Timings ----------
+if debug_timings:
+    spans = telemetry.current_run()
+    with st.sidebar.expander("⏱️ Stage timings (this rerun)", expanded=True):
+        if spans:
+            timings = pd.DataFrame(spans)[["stage", "seconds", "rows", "cache"]]
+            timings["ms"] = (timings.pop("seconds") * 1000).round(1)
+            st.dataframe(timings, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No spans recorded.")
+telemetry.flush_run()
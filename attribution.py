@@ -0,0 +1,155 @@
+# attribution.py
+# مين من الرموز بيحرّك الـ GTI النهارده، وإزاي ارتباطهم ببعض بيتغير:
+# covariance/correlation متحركين على كذا نافذة مع بعض، كل شمعة جديدة بتكلف O(k²) لكل نافذة
+# (مجاميع جارية بدل إعادة حساب النافذة كلها).
+import numpy as np
+import pandas as pd
+from gti_engine import signed_weights
+
+ATTRIBUTION_WINDOWS = (20, 60, 120)   # بعدد الشموع (أيام تداول)
+REBASE_EVERY = 1000                    # كل كام شمعة نعيد حساب المجاميع من الـ buffer (تراكم أخطاء التقريب)
+
+class AttributionEngine:
+    """
+    engine = AttributionEngine.from_prices(prices, weights)
+    engine.update(new_prices)             # الصفوف الجديدة بس
+    engine.contributions(60)              # جدول لكل رمز: العائد، المساهمة، نصيبه من التذبذب
+    engine.correlation(60)                # DataFrame (k × k)
+
+    لكل نافذة w: S1 = Σr و S2 = Σ rrᵀ على آخر w شمعة. الشمعة الجديدة بتتضاف
+    واللي خرجت من النافذة بتتطرح (من ring buffer بطول أكبر نافذة).
+    العوائد بنفس منطق compute_gti: pct_change والـ NaN = صفر.
+    """
+
+    def __init__(self, weights: pd.DataFrame, symbols, windows=ATTRIBUTION_WINDOWS, rebase_every: int = REBASE_EVERY):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.w = signed_weights(weights, self.symbols)
+        self.windows = tuple(sorted(set(windows)))
+        self.rebase_every = rebase_every
+        k = len(self.symbols)
+        self._buf = np.zeros((max(self.windows), k))
+        self._pos = 0          # مكان الشمعة الجاية في الـ buffer
+        self._n = 0            # عدد الشموع الكلي
+        self._since_rebase = 0
+        self._s1 = {w: np.zeros(k) for w in self.windows}
+        self._s2 = {w: np.zeros((k, k)) for w in self.windows}
+        self.last_return = np.zeros(k)
+        self.last_prices = None
+        self.last_date = None
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, weights: pd.DataFrame, windows=ATTRIBUTION_WINDOWS) -> "AttributionEngine":
+        """بداية من تاريخ كامل: المجاميع بتتحسب مرة واحدة (ضرب مصفوفات) من آخر max(windows) شمعة"""
+        symbols = [s for s in weights["symbol"] if s in prices.columns]
+        engine = cls(weights, symbols, windows)
+        prices = prices.sort_index()
+        returns = prices.reindex(columns=engine.symbols).pct_change(fill_method=None).dropna(how="all")
+        r = np.nan_to_num(returns.to_numpy(dtype="float64"))
+        m = len(engine._buf)
+        tail = r[-m:]
+        engine._buf[:len(tail)] = tail
+        engine._pos = len(tail) % m
+        engine._n = len(r)
+        engine._rebase()
+        if len(r):
+            engine.last_return = r[-1].copy()
+        if len(prices):
+            engine.last_prices = prices.reindex(columns=engine.symbols).to_numpy(dtype="float64")[-1].copy()
+            engine.last_date = prices.index[-1]
+        return engine
+
+    # ---------- Updates ----------
+    def _rows(self, window: int) -> np.ndarray:
+        """آخر min(n, window) شمعة بالترتيب الزمني"""
+        cnt = min(self._n, window)
+        m = len(self._buf)
+        return self._buf[(self._pos - cnt + np.arange(cnt)) % m]
+
+    def _rebase(self):
+        for w in self.windows:
+            R = self._rows(w)
+            self._s1[w] = R.sum(axis=0)
+            self._s2[w] = R.T @ R
+        self._since_rebase = 0
+
+    def push(self, r: np.ndarray):
+        """شمعة عوائد واحدة (بنفس ترتيب self.symbols): O(k²) لكل نافذة"""
+        r = np.nan_to_num(np.asarray(r, dtype="float64"))
+        m = len(self._buf)
+        for w in self.windows:
+            if self._n >= w:
+                old = self._buf[(self._pos - w) % m]
+                self._s1[w] -= old
+                self._s2[w] -= np.outer(old, old)
+            self._s1[w] += r
+            self._s2[w] += np.outer(r, r)
+        self._buf[self._pos] = r
+        self._pos = (self._pos + 1) % m
+        self._n += 1
+        self.last_return = r
+        self._since_rebase += 1
+        if self._since_rebase >= self.rebase_every:
+            self._rebase()
+
+    def update(self, prices: pd.DataFrame) -> int:
+        """صفوف أسعار جديدة (زي GTIAccumulator.update)، وبيرجع عدد الشموع اللي اتضافت"""
+        prices = prices.sort_index()
+        if self.last_date is not None:
+            prices = prices[prices.index > self.last_date]
+        if prices.empty:
+            return 0
+        p = prices.reindex(columns=self.symbols).to_numpy(dtype="float64")
+        prev = np.vstack([p[:1] * np.nan if self.last_prices is None else self.last_prices, p[:-1]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = p / prev - 1
+        self.last_prices = p[-1].copy()
+        self.last_date = prices.index[-1]
+        added = 0
+        for row in r:
+            if not np.isnan(row).all():
+                self.push(row)
+                added += 1
+        return added
+
+    # ---------- Results ----------
+    def count(self, window: int) -> int:
+        return min(self._n, window)
+
+    def _cov(self, window: int) -> np.ndarray:
+        n = self.count(window)
+        if n < 2:
+            return np.full((len(self.symbols),) * 2, np.nan)
+        s1 = self._s1[window]
+        return (self._s2[window] - np.outer(s1, s1) / n) / (n - 1)
+
+    def covariance(self, window: int) -> pd.DataFrame:
+        return pd.DataFrame(self._cov(window), index=self.symbols, columns=self.symbols)
+
+    def correlation(self, window: int) -> pd.DataFrame:
+        cov = self._cov(window)
+        d = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(d, d)
+        corr = np.where(np.outer(d, d) > 0, corr, np.nan)
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.symbols, columns=self.symbols)
+
+    def contributions(self, window: int) -> pd.DataFrame:
+        """
+        لكل رمز:
+          contribution         مساهمته في العائد الموزون لآخر شمعة (w × r)
+          window_contribution  مجموع مساهماته على النافذة
+          risk_share           نصيبه من تباين المؤشر على النافذة: w·(Σw) / wᵀΣw
+        """
+        cov = self._cov(window)
+        marginal = cov @ self.w
+        total = float(self.w @ marginal)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            risk_share = self.w * marginal / total if total > 0 else np.full(len(self.w), np.nan)
+        return pd.DataFrame({
+            "weight": self.w,
+            "return": self.last_return,
+            "contribution": self.w * self.last_return,
+            "window_contribution": self.w * self._s1[window],
+            "volatility": np.sqrt(np.clip(np.diag(cov), 0, None)),
+            "risk_share": risk_share,
+        }, index=pd.Index(self.symbols, name="symbol"))
@@ -0,0 +1,86 @@
+# backtest.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+METRICS = ["Final Cumulative Return", "Volatility", "Sharpe-like", "Correlation with SPY"]
+
+# ---------- Candidates ----------
+def candidate_matrix(candidates: pd.DataFrame, symbols) -> tuple[list, np.ndarray]:
+    """
+    تحويل المرشحين (بنفس أعمدة stocks_weights.csv + عمود candidate) لمصفوفة أوزان
+    موقّعة ومطبّعة (عدد المرشحين × عدد الرموز)، زي signed_weights في gti_engine.
+    الرموز اللي مش موجودة في symbols بتتشال قبل التطبيع.
+    """
+    symbols = list(symbols)
+    df = candidates[candidates["symbol"].isin(symbols)].drop_duplicates(["candidate", "symbol"], keep="last")
+    ids = list(dict.fromkeys(candidates["candidate"]))
+    signed = df["weight"].astype("float64") * np.where(df["positive"].astype(int) == 1, 1.0, -1.0)
+    wide = (
+        df.assign(signed=signed)
+        .pivot(index="candidate", columns="symbol", values="signed")
+        .reindex(index=ids, columns=symbols)
+        .fillna(0.0)
+    )
+    totals = df.groupby("candidate")["weight"].sum().reindex(ids).to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        W = wide.to_numpy(dtype="float64") / totals[:, None]
+    return ids, np.nan_to_num(W)
+
+def single_asset_candidates(symbols) -> pd.DataFrame:
+    """كل رمز لوحده كمرشح بوزن 1 (زي سيناريوهات scenarios.csv)"""
+    return pd.DataFrame({"candidate": list(symbols), "symbol": list(symbols), "weight": 1.0, "positive": 1})
+
+# ---------- Metrics ----------
+def _chunk_metrics(R: np.ndarray, bench: np.ndarray, W: np.ndarray) -> np.ndarray:
+    """المقاييس لمجموعة مرشحين دفعة واحدة: R (أيام × رموز)، W (مرشحين × رموز)"""
+    P = R @ W.T                                   # عوائد كل مرشح (أيام × مرشحين)
+    cumulative = np.prod(1.0 + P, axis=0)
+    volatility = P.std(axis=0, ddof=1)
+    mean = P.mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(volatility > 0, mean / volatility, 0.0)
+
+        ok = np.isfinite(bench)
+        x = P[ok] - P[ok].mean(axis=0)
+        y = bench[ok] - bench[ok].mean()
+        corr = (x.T @ y) / np.sqrt((x ** 2).sum(axis=0) * (y ** 2).sum())
+    return np.column_stack([cumulative, volatility, sharpe, corr])
+
+_WORKER = {}
+
+def _init_worker(R, bench):
+    _WORKER["R"], _WORKER["bench"] = R, bench
+
+def _worker_metrics(W):
+    return _chunk_metrics(_WORKER["R"], _WORKER["bench"], W)
+
+# ---------- Public API ----------
+def backtest(prices: pd.DataFrame, candidates: pd.DataFrame, benchmark: str = "SPY",
+             chunk_size: int = 4096, n_jobs: int | None = None) -> pd.DataFrame:
+    """
+    تقييم كل المرشحين مرة واحدة كعمليات مصفوفات: العائد التراكمي النهائي، التذبذب،
+    Sharpe-like والارتباط مع benchmark — نفس مقاييس gti_test.py.
+    الشغل بيتقسم على دفعات chunk_size عشان الذاكرة، ولو n_jobs > 1 بيتوزع على processes.
+    """
+    symbols = [s for s in dict.fromkeys(candidates["symbol"]) if s in prices.columns]
+    ids, W = candidate_matrix(candidates, symbols)
+
+    returns = prices.pct_change(fill_method=None).iloc[1:]
+    R = np.nan_to_num(returns[symbols].to_numpy(dtype="float64"))
+    bench = returns[benchmark].to_numpy(dtype="float64") if benchmark in returns else np.full(len(R), np.nan)
+
+    chunks = [W[i:i + chunk_size] for i in range(0, len(W), chunk_size)]
+    n_jobs = n_jobs if n_jobs is not None else 1
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(R, bench)) as pool:
+            parts = list(pool.map(_worker_metrics, chunks))
+    else:
+        parts = [_chunk_metrics(R, bench, c) for c in chunks]
+
+    values = np.vstack(parts) if parts else np.empty((0, len(METRICS)))
+    columns = METRICS[:-1] + [f"Correlation with {benchmark}"]
+    return pd.DataFrame(values, index=pd.Index(ids, name="candidate"), columns=columns)
@@ -0,0 +1,64 @@
+# benchmarks/bench_keywords.py
+# مقارنة الـ matcher المُجمّع بالطريقة القديمة (any(k in title.lower())) على عناوين صناعية
+#   python -m benchmarks.bench_keywords --titles 200000
+import argparse
+import random
+import time
+from events import DEFAULT_KEYWORDS, RISK_KEYWORDS
+from keyword_matcher import KeywordMatcher
+
+WORDS = [
+    "minister", "talks", "market", "rally", "border", "troops", "summit", "oil", "prices",
+    "election", "court", "ruling", "storm", "award", "software", "warning", "strike", "central",
+    "bank", "rates", "inflation", "exports", "tariffs", "ceasefire", "drone", "coalition",
+]
+KEYWORDS = sorted({k for ks in RISK_KEYWORDS.values() for k in ks} | set(DEFAULT_KEYWORDS))
+
+def synthetic_titles(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(n):
+        words = rng.choices(WORDS, k=rng.randint(6, 14))
+        if rng.random() < 0.4:
+            words.insert(rng.randrange(len(words)), rng.choice(KEYWORDS).capitalize())
+        titles.append(" ".join(words).capitalize())
+    return titles
+
+def _baseline(titles, keywords):
+    out = []
+    for title in titles:
+        keep = any(k.lower() in title.lower() for k in keywords)
+        title_lower = title.lower()
+        risk = next((r for r, ks in RISK_KEYWORDS.items() if any(k in title_lower for k in ks)), "Low")
+        out.append((keep, risk))
+    return out
+
+def run(n_titles: int = 200_000, seed: int = 0) -> dict:
+    titles = synthetic_titles(n_titles, seed)
+    matcher = KeywordMatcher(DEFAULT_KEYWORDS, RISK_KEYWORDS)
+
+    t0 = time.perf_counter()
+    expected = _baseline(titles, DEFAULT_KEYWORDS)
+    t1 = time.perf_counter()
+    single = [matcher.scan(t) for t in titles]
+    t2 = time.perf_counter()
+    batch = matcher.scan_many(titles)
+    t3 = time.perf_counter()
+
+    assert single == expected
+    assert list(zip(batch["match"], batch["Risk"])) == expected
+    return {
+        "titles": n_titles,
+        "baseline_s": t1 - t0,
+        "scan_s": t2 - t1,
+        "scan_many_s": t3 - t2,
+        "speedup": (t1 - t0) / (t3 - t2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for k, v in run(args.titles, args.seed).items():
+        print(f"{k:>12}: {v:.4f}" if isinstance(v, float) else f"{k:>12}: {v}")
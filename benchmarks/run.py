@@ -0,0 +1,186 @@
+# benchmarks/run.py
+# قياس زمن كل مرحلة على بيانات صناعية بأحجام مختلفة، والنتيجة JSON للمقارنة بين الـ commits.
+#   python -m benchmarks.run --scales 25x1 100x5 500x10 --out benchmarks/results/latest.json
+#   python -m benchmarks.run --compare benchmarks/results/old.json benchmarks/results/new.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+
+from benchmarks.synthetic import FeedServer, SyntheticProvider
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def _timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+# ---------- Stages ----------
+def bench_prices(provider: SyntheticProvider, workdir: str, repeat: int) -> dict:
+    import price_store
+    from gti_engine import GTIAccumulator, compute_gti
+
+    start, end = provider.dates[0], provider.dates[-1] + pd.Timedelta(days=1)
+    store = os.path.join(workdir, "prices.sqlite")
+
+    def cold():
+        if os.path.exists(store):
+            os.remove(store)
+        price_store.load_close(provider.tickers, start, end, fetcher=provider.fetch, path=store)
+
+    out = {"price_store_cold": _timed(cold, repeat)}
+    out["price_store_warm"] = _timed(
+        lambda: price_store.load_close(provider.tickers, start, end, fetcher=provider.fetch, path=store), repeat)
+
+    prices, weights = provider.prices(), provider.weights()
+    out["compute_gti"] = _timed(lambda: compute_gti(prices, weights), repeat)
+
+    acc = GTIAccumulator.from_prices(prices.iloc[:-1], weights)
+    state = acc.to_dict()
+    out["gti_accumulator_append_1"] = _timed(
+        lambda: GTIAccumulator.from_dict(state).update(prices.iloc[-1:]), repeat)
+    return out
+
+def bench_markets(provider: SyntheticProvider, workdir: str, repeat: int) -> dict:
+    import price_store
+    import index_analysis
+
+    markets_path = os.path.join(workdir, "markets.json")
+    with open(markets_path, "w", encoding="utf-8") as f:
+        json.dump(provider.markets(), f)
+    old_store, price_store.STORE_FILE = price_store.STORE_FILE, os.path.join(workdir, "markets.sqlite")
+
+    end = provider.dates[-1]
+    start = end - pd.Timedelta(days=365)
+    args = dict(markets_path=markets_path, fetcher=provider.fetch)
+
+    try:
+        index_analysis.clear_results_cache()
+        t0 = time.perf_counter()
+        df = index_analysis.build_results(start, end, end, **args)
+        out = {"build_results_cold": time.perf_counter() - t0}
+
+        def warm():
+            index_analysis.clear_results_cache()
+            index_analysis.build_results(start, end, end, **args)
+        out["build_results_warm"] = _timed(warm, repeat)
+        out["build_results_cached"] = _timed(lambda: index_analysis.build_results(start, end, end, **args), repeat)
+        out["attach_color_classes"] = _timed(lambda: index_analysis.attach_color_classes(df), repeat)
+        try:
+            import plotly  # noqa: F401
+        except ImportError:
+            return out
+        def plot():
+            index_analysis.clear_results_cache()
+            index_analysis.plot_world_map(start, end, end, **args)
+        out["plot_world_map"] = _timed(plot, repeat)
+        out["plot_world_map_cached"] = _timed(lambda: index_analysis.plot_world_map(start, end, end, **args), repeat)
+        return out
+    finally:
+        price_store.STORE_FILE = old_store
+
+def bench_events(n_feeds: int, n_items: int, repeat: int) -> dict:
+    import events
+    from datetime import date, timedelta
+
+    out = {}
+    with FeedServer(n_feeds=n_feeds, n_items=n_items) as server:
+        today = date.today()
+        run = lambda: events.fetch_events(today - timedelta(days=30), today, feeds=server.urls)
+
+        def cold():
+            events._FEED_CACHE.clear()
+            run()
+        out["fetch_events_cold"] = _timed(cold, repeat)
+        out["fetch_events_ttl_hit"] = _timed(run, repeat)
+
+        def revalidate():
+            for cached in events._FEED_CACHE.values():
+                cached["fetched_at"] -= events.FEED_TTL
+            run()
+        out["fetch_events_304"] = _timed(revalidate, repeat)
+    return out
+
+def bench_keywords(n_titles: int) -> dict:
+    from benchmarks import bench_keywords
+    r = bench_keywords.run(n_titles)
+    return {"keywords_baseline": r["baseline_s"], "keywords_scan_many": r["scan_many_s"]}
+
+# ---------- Runner ----------
+def run(scales, repeat: int = 3, n_feeds: int = 5, n_items: int = 100, n_titles: int = 50_000) -> dict:
+    results = []
+    for scale in scales:
+        n_tickers, years = (int(x) for x in scale.lower().split("x"))
+        provider = SyntheticProvider(n_tickers=n_tickers, years=years)
+        with tempfile.TemporaryDirectory() as workdir:
+            stages = {}
+            stages.update(bench_prices(provider, workdir, repeat))
+            stages.update(bench_markets(provider, workdir, repeat))
+        for stage, seconds in stages.items():
+            results.append({"scale": scale, "tickers": n_tickers, "years": years, "stage": stage, "seconds": seconds})
+            print(f"{scale:>8} {stage:<28} {seconds * 1000:10.2f} ms")
+
+    for stage, seconds in {**bench_events(n_feeds, n_items, repeat), **bench_keywords(n_titles)}.items():
+        results.append({"scale": f"{n_feeds}feeds", "stage": stage, "seconds": seconds})
+        print(f"{'-':>8} {stage:<28} {seconds * 1000:10.2f} ms")
+
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare(old_path: str, new_path: str) -> pd.DataFrame:
+    """نسبة الزمن الجديد للقديم لكل (مرحلة، حجم): أكبر من 1 يعني أبطأ"""
+    frames = []
+    for path, label in [(old_path, "old"), (new_path, "new")]:
+        with open(path, "r", encoding="utf-8") as f:
+            df = pd.DataFrame(json.load(f)["results"])
+        frames.append(df.set_index(["stage", "scale"])["seconds"].rename(label))
+    df = pd.concat(frames, axis=1)
+    df["ratio"] = df["new"] / df["old"]
+    return df.sort_values("ratio", ascending=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.run")
+    parser.add_argument("--scales", nargs="+", default=["25x1", "100x5", "500x10"], help="TICKERSxYEARS")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--feeds", type=int, default=5)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--titles", type=int, default=50_000)
+    parser.add_argument("--out", help="JSON output path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare(*args.compare).to_string())
+        return
+
+    report = run(args.scales, args.repeat, args.feeds, args.items, args.titles)
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# benchmarks/synthetic.py
+# مزود بيانات محلي حتمي (من غير Yahoo ولا RSS حقيقي) للـ benchmarks وكمدخلات ثابتة للاختبار.
+import http.server
+import threading
+import time
+import zlib
+from email.utils import formatdate
+import numpy as np
+import pandas as pd
+
+HISTORY_END = pd.Timestamp("2024-12-31")
+
+class SyntheticProvider:
+    """
+    أسعار OHLC صناعية لـ n_tickers على مدى years سنة (أيام عمل).
+    كل تيكر ليه مسار ثابت (random walk من seed + رقمه)، فأي مدى يتطلب بيرجع نفس الأرقام.
+    fetch(tickers, start, end) بنفس شكل المزود في price_store (Date × Ticker للإغلاق).
+    """
+
+    def __init__(self, n_tickers: int = 25, years: int = 1, seed: int = 0):
+        self.seed = seed
+        self.tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+        self.dates = pd.bdate_range(HISTORY_END - pd.DateOffset(years=years), HISTORY_END)
+        self._cache = {}
+        self.calls = []
+
+    def _ohlc(self, ticker: str) -> np.ndarray:
+        arr = self._cache.get(ticker)
+        if arr is None:
+            i = int(ticker[3:]) if ticker.startswith("SYN") and ticker[3:].isdigit() else zlib.crc32(ticker.encode())
+            rng = np.random.default_rng([self.seed, i])
+            close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.012, len(self.dates))))
+            open_ = close * np.exp(rng.normal(0, 0.004, len(close)))
+            high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, len(close))))
+            low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, len(close))))
+            arr = self._cache[ticker] = np.column_stack([open_, high, low, close])
+        return arr
+
+    def _slice(self, start, end) -> slice:
+        lo = self.dates.searchsorted(pd.Timestamp(start))
+        hi = self.dates.searchsorted(pd.Timestamp(end))
+        return slice(lo, hi)
+
+    def ohlc(self, tickers, start, end) -> pd.DataFrame:
+        """نفس شكل yf.download لعدة تيكرات: أعمدة MultiIndex (Price, Ticker)"""
+        sl = self._slice(start, end)
+        fields = ["Open", "High", "Low", "Close"]
+        frames = {
+            (field, t): self._ohlc(t)[sl, j]
+            for j, field in enumerate(fields)
+            for t in tickers
+        }
+        return pd.DataFrame(frames, index=self.dates[sl].rename("Date"))
+
+    def fetch(self, tickers, start, end) -> pd.DataFrame:
+        tickers = list(tickers)
+        self.calls.append((tuple(tickers), str(start), str(end)))
+        sl = self._slice(start, end)
+        data = {t: self._ohlc(t)[sl, 3] for t in tickers}
+        return pd.DataFrame(data, index=self.dates[sl].rename("Date"))
+
+    def prices(self) -> pd.DataFrame:
+        return self.fetch(self.tickers, self.dates[0], self.dates[-1] + pd.Timedelta(days=1))
+
+    def weights(self) -> pd.DataFrame:
+        rng = np.random.default_rng([self.seed, 1])
+        return pd.DataFrame({
+            "symbol": self.tickers,
+            "full_name": self.tickers,
+            "weight": rng.integers(1, 16, len(self.tickers)).astype(float),
+            "positive": rng.integers(0, 2, len(self.tickers)),
+        })
+
+    def markets(self) -> list:
+        return [
+            {"Country": f"Country {i}", "MainIndexName": f"Index {t}", "YahooTicker": t}
+            for i, t in enumerate(self.tickers)
+        ]
+
+# ---------- RSS ----------
+HEADLINE_WORDS = [
+    "minister", "talks", "market", "rally", "border", "troops", "summit", "oil", "prices",
+    "election", "war", "conflict", "trade", "sanctions", "protest", "economic", "policy", "attack",
+]
+
+def rss_feed(n_items: int = 50, seed: int = 0, title: str = "Synthetic Feed", now: float | None = None) -> bytes:
+    rng = np.random.default_rng(seed)
+    now = time.time() if now is None else now
+    items = []
+    for i in range(n_items):
+        words = rng.choice(HEADLINE_WORDS, size=rng.integers(5, 10))
+        headline = " ".join(words).capitalize()
+        pub = formatdate(now - i * 1800, usegmt=True)
+        items.append(
+            f"<item><title>{headline}</title><link>http://synthetic.local/{seed}/{i}</link>"
+            f"<pubDate>{pub}</pubDate></item>"
+        )
+    return (
+        "<?xml version='1.0' encoding='utf-8'?><rss version='2.0'><channel>"
+        f"<title>{title}</title>{''.join(items)}</channel></rss>"
+    ).encode("utf-8")
+
+class FeedServer:
+    """
+    سيرفر HTTP محلي بيقدم n_feeds مصدر صناعي على /feed/<i>، مع ETag
+    (فالطلب المشروط بيرجع 304). بيتستخدم كـ context manager.
+    """
+
+    def __init__(self, n_feeds: int = 3, n_items: int = 50, seed: int = 0):
+        self.bodies = [rss_feed(n_items, seed + i, f"Synthetic Feed {i}") for i in range(n_feeds)]
+        self.requests = []
+        self._server = None
+
+    def __enter__(self) -> "FeedServer":
+        bodies, log = self.bodies, self.requests
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    i = int(self.path.rsplit("/", 1)[-1])
+                    body = bodies[i]
+                except (ValueError, IndexError):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                etag = f'"feed-{i}"'
+                log.append((self.path, self.headers.get("If-None-Match")))
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def urls(self) -> list:
+        host, port = self._server.server_address[:2]
+        return [f"http://{host}:{port}/feed/{i}" for i in range(len(self.bodies))]
+
+# ---------- GitHub Contents API ----------
+class ContentsAPIServer:
+    """
+    بديل محلي لـ GitHub contents API (GET/PUT /repos/<owner>/<repo>/contents/<path>)
+    لتجربة github_sync من غير شبكة: بيتحقق من الـ sha زي GitHub (409 لو قديم)،
+    و fail_next بيخلي أول N طلب يرجعوا 500 لتجربة الـ retry.
+    """
+
+    def __init__(self, files: dict | None = None, fail_next: int = 0, latency: float = 0.0):
+        self.files = {p: c.encode("utf-8") if isinstance(c, str) else c for p, c in (files or {}).items()}
+        self.commits = []
+        self.requests = []
+        self.fail_next = fail_next
+        self.latency = latency
+        self._server = None
+
+    def __enter__(self) -> "ContentsAPIServer":
+        import base64
+        import json
+        from github_sync import blob_sha
+        api = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def _reply(self, code, body=None):
+                data = json.dumps(body or {}).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _path(self):
+                parts = self.path.split("?", 1)[0].split("/contents/", 1)
+                return parts[1] if len(parts) == 2 else None
+
+            def _handle(self, method):
+                api.requests.append((method, self.path))
+                time.sleep(api.latency)
+                if api.fail_next > 0:
+                    api.fail_next -= 1
+                    return self._reply(500, {"message": "synthetic failure"})
+                path = self._path()
+                if path is None:
+                    return self._reply(404, {"message": "Not Found"})
+                current = api.files.get(path)
+                if method == "GET":
+                    if current is None:
+                        return self._reply(404, {"message": "Not Found"})
+                    return self._reply(200, {"path": path, "sha": blob_sha(current),
+                                             "content": base64.b64encode(current).decode()})
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if current is not None and payload.get("sha") != blob_sha(current):
+                    return self._reply(409, {"message": "sha does not match"})
+                data = base64.b64decode(payload["content"])
+                api.files[path] = data
+                api.commits.append((path, payload.get("message")))
+                return self._reply(201 if current is None else 200, {"content": {"path": path, "sha": blob_sha(data)}})
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_PUT(self):
+                self._handle("PUT")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
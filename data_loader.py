@@ -1,14 +1,152 @@
-import yfinance as yf
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
 
 def load_stock_data(tickers, start="2020-01-01", end=None):
     """
     تحميل البيانات التاريخية للأسهم من Yahoo Finance
     """
+    import yfinance as yf
     data = yf.download(tickers, start=start, end=end, group_by="ticker", auto_adjust=True)
-    
+
     # لو البيانات فيها مستوى متعدد للأعمدة نحوله لشكل بسيط
     if isinstance(data.columns, pd.MultiIndex):
         data = data.stack(level=0).rename_axis(['Date', 'Ticker']).reset_index()
-    
+
     return data
+
+# ---------- Compact Wide Panel ----------
+# الأسعار بتتخزن (تيكر × تاريخ) بترتيب C، فكل تيكر (أو مجموعة تيكرات متجاورة) حتة واحدة
+# متصلة في الملف: قراءة chunk من التيكرات من memmap بتحمّل الصفحات دي بس.
+PANEL_VALUES = "values.npy"
+PANEL_DATES = "dates.npy"
+PANEL_TICKERS = "tickers.json"
+
+class PricePanel:
+    """
+    جدول أسعار عريض مضغوط: مصفوفة NumPy واحدة + تواريخ مشتركة + قاموس تيكر → عمود.
+      panel.values            (تاريخ × تيكر) view من غير نسخ
+      panel.series("SPY")     مصفوفة الأسعار لتيكر واحد (view)
+      panel.slice(start, end, tickers)   view لو التيكرات متجاورة، غير كده نسخة للتيكرات دي بس
+    """
+
+    def __init__(self, data: np.ndarray, dates, tickers):
+        self.data = data                                   # (تيكر × تاريخ)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.tickers = list(tickers)
+        self.index = {t: i for i, t in enumerate(self.tickers)}
+        if data.shape != (len(self.tickers), len(self.dates)):
+            raise ValueError(f"Panel shape {data.shape} does not match {len(self.tickers)} tickers x {len(self.dates)} dates")
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.data.T
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.dates), len(self.tickers)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _rows(self, start=None, end=None) -> slice:
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).date(), "D")))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end).date(), "D")))
+        return slice(lo, hi)
+
+    def series(self, ticker: str, start=None, end=None) -> np.ndarray:
+        return self.data[self.index[ticker], self._rows(start, end)]
+
+    def slice(self, start=None, end=None, tickers=None) -> "PricePanel":
+        """[start, end) × tickers؛ من غير نسخ لو tickers مدى متجاور (أو None)"""
+        rows = self._rows(start, end)
+        if tickers is None:
+            cols = slice(None)
+        else:
+            pos = [self.index[t] for t in tickers]
+            contiguous = pos and pos == list(range(pos[0], pos[0] + len(pos)))
+            cols = slice(pos[0], pos[0] + len(pos)) if contiguous else pos
+        names = self.tickers[cols] if isinstance(cols, slice) else [self.tickers[i] for i in cols]
+        return PricePanel(self.data[cols, rows], self.dates[rows], names)
+
+    def iter_chunks(self, chunk_size: int = 500):
+        """مجموعات تيكرات متجاورة: (tickers, مصفوفة تاريخ × تيكر) كلها views"""
+        for i in range(0, len(self.tickers), chunk_size):
+            yield self.tickers[i:i + chunk_size], self.data[i:i + chunk_size].T
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.dates, name="Date"), columns=self.tickers)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, field: str = "Close", dtype="float32") -> "PricePanel":
+        """
+        من جدول عريض (Date × Ticker) أو من الشكل الطويل بتاع load_stock_data
+        (أعمدة Date, Ticker, Close, ...).
+        """
+        if {"Date", "Ticker"}.issubset(df.columns):
+            df = df.pivot_table(index="Date", columns="Ticker", values=field, aggfunc="last")
+        df = df.sort_index()
+        data = np.ascontiguousarray(df.to_numpy(dtype=dtype).T)
+        return cls(data, pd.DatetimeIndex(df.index).to_numpy(dtype="datetime64[D]"), [str(c) for c in df.columns])
+
+# ---------- Persistence ----------
+def save_panel(panel: PricePanel, path: str):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, PANEL_VALUES), np.ascontiguousarray(panel.data))
+    np.save(os.path.join(path, PANEL_DATES), panel.dates)
+    with open(os.path.join(path, PANEL_TICKERS), "w", encoding="utf-8") as f:
+        json.dump(panel.tickers, f)
+
+def load_panel(path: str, mmap: bool = True) -> PricePanel:
+    """mmap=True: المصفوفة بتتقري من الديسك عند الطلب (read-only) من غير ما تتحمل كلها في الذاكرة"""
+    data = np.load(os.path.join(path, PANEL_VALUES), mmap_mode="r" if mmap else None)
+    dates = np.load(os.path.join(path, PANEL_DATES))
+    with open(os.path.join(path, PANEL_TICKERS), "r", encoding="utf-8") as f:
+        tickers = json.load(f)
+    return PricePanel(data, dates, tickers)
+
+def build_panel(tickers, start, end, path: str, chunk_size: int = 200, dtype="float32", fetcher=None) -> PricePanel:
+    """
+    تحميل أسعار الإغلاق لعدد كبير من التيكرات على دفعات (chunk_size تيكر في كل طلب)
+    وكتابتها مباشرة في memmap على الديسك، فالذاكرة مش بتشيل غير دفعة واحدة في المرة.
+    fetcher(tickers, start, end) بنفس شكل price_store.yahoo_fetch.
+    """
+    if fetcher is None:
+        from price_store import yahoo_fetch as fetcher
+    tickers = list(dict.fromkeys(tickers))
+    os.makedirs(path, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=path)
+    try:
+        # المرحلة 1: كل دفعة على الديسك لوحدها + اتحاد التواريخ
+        parts, all_dates = [], np.array([], dtype="datetime64[D]")
+        for i in range(0, len(tickers), chunk_size):
+            chunk = tickers[i:i + chunk_size]
+            df = fetcher(chunk, start, end)
+            df = df.reindex(columns=chunk) if df is not None and not df.empty else pd.DataFrame(columns=chunk, dtype=dtype)
+            dates = pd.DatetimeIndex(df.index).to_numpy(dtype="datetime64[D]")
+            part = os.path.join(tmp, f"{len(parts)}.npz")
+            np.savez(part, values=df.to_numpy(dtype=dtype).T, dates=dates)
+            parts.append(part)
+            all_dates = np.union1d(all_dates, dates)
+
+        # المرحلة 2: المصفوفة النهائية memmap، وكل دفعة بتتحط في مكانها على التواريخ المشتركة
+        out = np.lib.format.open_memmap(os.path.join(path, PANEL_VALUES), mode="w+",
+                                        dtype=dtype, shape=(len(tickers), len(all_dates)))
+        out[:] = np.nan
+        row = 0
+        for part in parts:
+            with np.load(part) as z:
+                values, dates = z["values"], z["dates"]
+                out[row:row + len(values), np.searchsorted(all_dates, dates)] = values
+                row += len(values)
+        out.flush()
+        del out
+        np.save(os.path.join(path, PANEL_DATES), all_dates)
+        with open(os.path.join(path, PANEL_TICKERS), "w", encoding="utf-8") as f:
+            json.dump(tickers, f)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return load_panel(path)
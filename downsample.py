@@ -0,0 +1,50 @@
+# downsample.py
+# تقليل نقاط الرسم (LTTB: Largest-Triangle-Three-Buckets) مع الحفاظ على شكل المنحنى،
+# فحجم الـ chart اللي بيتبعت للمتصفح ثابت مهما طال التاريخ.
+import numpy as np
+import pandas as pd
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    أرقام النقاط المختارة (مرتبة، أول وآخر نقطة دايمًا موجودين).
+    من كل bucket بناخد النقطة اللي بتعمل أكبر مثلث مع النقطة المختارة قبلها
+    ومتوسط الـ bucket اللي بعدها، فالقمم والقيعان بتفضل ظاهرة.
+    أعلى وأقل قيمة في السلسلة كلها دايمًا موجودين: الـ bucket اللي فيه واحدة منهم بياخدها هي
+    (ولو الاتنين في نفس الـ bucket، الناقصة بتتضاف فالنتيجة threshold + 1 نقطة).
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+
+    # حدود الـ buckets للنقاط من 1 لـ n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    out = np.empty(threshold, dtype=int)
+    out[0], out[-1] = 0, n - 1
+
+    finite = np.isfinite(y)
+    extremes = sorted({int(np.nanargmax(y)), int(np.nanargmin(y))}) if finite.any() else []
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        forced = [e for e in extremes if lo <= e < hi]
+        if forced:
+            a = max(forced, key=lambda e: area[e - lo])
+        else:
+            a = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        out[i + 1] = a
+    missing = [e for e in extremes if e not in out]
+    return np.union1d(out, missing).astype(int) if missing else out
+
+def downsample_frame(df: pd.DataFrame, x: str, y: str, threshold: int) -> pd.DataFrame:
+    """نفس الجدول بعد LTTB على العمودين x/y (x ممكن يكون تاريخ)"""
+    if len(df) <= threshold:
+        return df
+    xs = df[x]
+    xs = xs.to_numpy(dtype="datetime64[ns]").astype("int64") if pd.api.types.is_datetime64_any_dtype(xs) else xs.to_numpy()
+    return df.iloc[lttb_indices(xs, df[y].to_numpy(), threshold)]
@@ -0,0 +1,104 @@
+# event_store.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import pandas as pd
+
+# ---------- Config ----------
+EVENTS_DB = os.environ.get("GTI_EVENT_STORE", "events.sqlite")
+
+EVENT_COLUMNS = ["Date", "Title", "Source", "Link", "Risk"]
+
+_LOCK = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id         INTEGER PRIMARY KEY,
+    date       TEXT NOT NULL,
+    title      TEXT NOT NULL,
+    source     TEXT,
+    link       TEXT,
+    risk       TEXT NOT NULL,
+    risk_order INTEGER NOT NULL,
+    title_hash TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_events_link ON events(link) WHERE link IS NOT NULL AND link != '';
+CREATE UNIQUE INDEX IF NOT EXISTS ux_events_title_hash ON events(title_hash);
+CREATE INDEX IF NOT EXISTS ix_events_date ON events(date);
+CREATE INDEX IF NOT EXISTS ix_events_risk_date ON events(risk_order, date);
+"""
+
+# ---------- Helpers ----------
+def _connect(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=30)
+    con.executescript(_SCHEMA)
+    return con
+
+def title_hash(title: str) -> str:
+    """نفس العنوان من مصدرين مختلفين (أو بمسافات مختلفة) بيطلع نفس الـ hash"""
+    norm = re.sub(r"\s+", " ", str(title)).strip().lower()
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()
+
+def _source_name(source) -> str:
+    # feedparser بيرجع عنصر <source> كـ dict فيه title/href
+    if hasattr(source, "get"):
+        return source.get("title") or source.get("href") or "Unknown"
+    return str(source)
+
+# ---------- Public API ----------
+def add_events(events, risk_order: dict, path: str = EVENTS_DB) -> int:
+    """
+    إضافة أحداث (dicts فيها Date, Title, Source, Link, Risk).
+    المكرر (نفس الرابط أو نفس العنوان) بيتجاهل. بيرجع عدد الأحداث الجديدة.
+    """
+    rows = [
+        (
+            pd.Timestamp(e["Date"]).strftime("%Y-%m-%d"),
+            e["Title"],
+            _source_name(e.get("Source", "Unknown")),
+            e.get("Link") or None,
+            e["Risk"],
+            risk_order.get(e["Risk"], len(risk_order) + 1),
+            title_hash(e["Title"]),
+        )
+        for e in events
+    ]
+    if not rows:
+        return 0
+    with _LOCK:
+        con = _connect(path)
+        try:
+            before = con.total_changes
+            con.executemany(
+                "INSERT OR IGNORE INTO events (date, title, source, link, risk, risk_order, title_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            con.commit()
+            return con.total_changes - before
+        finally:
+            con.close()
+
+def query_events(start_date, end_date, risks=None, path: str = EVENTS_DB) -> pd.DataFrame:
+    """
+    الأحداث من start_date لـ end_date (شامل) من الفهرس، مرتبة بالخطورة ثم التاريخ تنازلي
+    """
+    sql = "SELECT date, title, source, link, risk, risk_order FROM events WHERE date BETWEEN ? AND ?"
+    params = [pd.Timestamp(start_date).strftime("%Y-%m-%d"), pd.Timestamp(end_date).strftime("%Y-%m-%d")]
+    if risks:
+        sql += f" AND risk IN ({','.join('?' * len(risks))})"
+        params.extend(risks)
+    sql += " ORDER BY risk_order ASC, date DESC, id ASC"
+
+    with _LOCK:
+        con = _connect(path)
+        try:
+            df = pd.read_sql_query(sql, con, params=params)
+        finally:
+            con.close()
+
+    df.columns = [*EVENT_COLUMNS, "RiskOrder"]
+    df["Date"] = pd.to_datetime(df["Date"]).dt.date
+    return df
@@ -0,0 +1,102 @@
+# event_study.py
+# المؤشر والأسواق اتحركوا إزاي حوالين الأخبار؟ (event study)
+# كل الأحداث × كل السلاسل في عملية واحدة: cumsum للتغييرات اليومية، وبعدين أي مجموع على
+# نافذة = فرق قيمتين من الـ cumsum (fancy indexing بمواقع الأحداث)، من غير loops.
+import warnings
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+PRE_WINDOW = 5          # شموع قبل يوم الحدث
+POST_WINDOW = 5         # شموع بعده
+ESTIMATION_WINDOW = 60  # شموع قبل النافذة لتقدير الحركة "العادية"
+
+class EventStudy(NamedTuple):
+    car: pd.DataFrame        # متوسط الحركة غير العادية التراكمية: (Risk, offset) × series
+    summary: pd.DataFrame    # لكل (Risk, series): mean, std, t, n للحركة على النافذة كلها
+    abnormal: pd.DataFrame   # حدث × series: الحركة غير العادية على النافذة كلها
+
+# ---------- Inputs ----------
+def study_inputs(gti_raw: pd.Series | None = None, closes: pd.DataFrame | dict | None = None) -> pd.DataFrame:
+    """
+    جدول تغييرات يومية (Date × series): فرق الـ GTI الخام (= العائد الموزون لليوم)
+    و log return لكل سوق (من download_closes / build_close_panel).
+    """
+    parts = []
+    if gti_raw is not None:
+        parts.append(gti_raw.sort_index().diff().rename("GTI"))
+    if closes is not None:
+        if isinstance(closes, dict):
+            from index_analysis import build_close_panel
+            closes = build_close_panel(closes)
+        # ffill قبل الفرق: إجازة سوق = تغيير صفر، واليوم اللي بعدها بياخد العائد كامل
+        with np.errstate(divide="ignore", invalid="ignore"):
+            parts.append(np.log(closes.sort_index()).ffill().diff())
+    changes = pd.concat(parts, axis=1).sort_index()
+    changes.index = pd.DatetimeIndex(changes.index).normalize()
+    return changes.groupby(level=0).last()
+
+def align_events(event_dates, dates: pd.DatetimeIndex) -> np.ndarray:
+    """as-of: موقع آخر شمعة في dates عند أو قبل تاريخ كل حدث (‎-1 لو قبل أول شمعة)"""
+    ev = pd.to_datetime(pd.Index(event_dates)).to_numpy(dtype="datetime64[ns]")
+    return np.searchsorted(dates.to_numpy(dtype="datetime64[ns]"), ev, side="right") - 1
+
+# ---------- Study ----------
+def event_study(events: pd.DataFrame, changes: pd.DataFrame, pre: int = PRE_WINDOW, post: int = POST_WINDOW,
+                estimation: int = ESTIMATION_WINDOW, date_col: str = "Date", risk_col: str = "Risk") -> EventStudy:
+    """
+    events: جدول فيه Date و Risk (زي events.query_events). changes: من study_inputs.
+    الحركة غير العادية = مجموع التغييرات من pre قبل الحدث لـ post بعده
+    ناقص (متوسط التغيير اليومي في نافذة التقدير × طول النافذة).
+    الأحداث اللي نافذتها بتخرج برّه البيانات بتتشال.
+    """
+    values = changes.to_numpy(dtype="float64")
+    valid = np.isfinite(values)
+    T, S = values.shape
+    # cumsum بصف أصفار في الأول: مجموع الصفوف [a, b) = C[b] - C[a]
+    C = np.vstack([np.zeros((1, S)), np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    N = np.vstack([np.zeros((1, S)), np.cumsum(valid, axis=0)])
+
+    pos = align_events(events[date_col], changes.index)
+    keep = (pos - pre - estimation >= 0) & (pos + post < T)
+    pos = pos[keep]
+    risks = events[risk_col].to_numpy()[keep]
+
+    lo = pos - pre
+    est_lo = lo - estimation
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normal = (C[lo] - C[est_lo]) / (N[lo] - N[est_lo])            # (E, S)
+
+        # مسار تراكمي لكل offset من -pre لـ post: (E, L, S)
+        offsets = np.arange(-pre, post + 1)
+        ends = pos[:, None] + offsets[None, :] + 1
+        # المتوقع = normal × عدد الشموع اللي ليها قيمة فعلًا (مش طول النافذة) عشان الـ NaN
+        counts = N[ends] - N[lo][:, None, :]
+        path = C[ends] - C[lo][:, None, :] - normal[:, None, :] * counts
+        covered = counts > 0
+        path = np.where(covered, path, np.nan)
+
+    abnormal = pd.DataFrame(path[:, -1, :], columns=changes.columns)
+    abnormal.insert(0, risk_col, risks)
+    abnormal.insert(0, "Date", changes.index[pos])
+
+    # متوسط لكل مستوى خطورة (groupby على مصفوفة الأحداث كلها مرة واحدة)
+    tiers = pd.Index(pd.unique(risks))
+    codes = tiers.get_indexer(risks)
+    car = {}
+    for k, tier in enumerate(tiers):
+        sel = path[codes == k]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)   # سلسلة من غير بيانات في كل الأحداث
+            car[tier] = pd.DataFrame(np.nanmean(sel, axis=0) if len(sel) else np.full((len(offsets), S), np.nan),
+                                     index=pd.Index(offsets, name="offset"), columns=changes.columns)
+    car = pd.concat(car, names=[risk_col]) if car else pd.DataFrame(columns=changes.columns)
+
+    g = abnormal.drop(columns="Date").groupby(risk_col)
+    mean, std, n = g.mean(), g.std(), g.count()
+    t = mean / (std / np.sqrt(n))
+    # (Risk × series) لكل إحصائية → صف لكل (Risk, series)، من غير stack (اتغيّر في pandas 2.1)
+    index = pd.MultiIndex.from_product([mean.index, mean.columns], names=[risk_col, "series"])
+    stats = {"mean": mean, "std": std, "t": t, "n": n}
+    summary = pd.DataFrame({k: v.reindex(index=mean.index, columns=mean.columns).to_numpy().ravel() for k, v in stats.items()}, index=index)
+    return EventStudy(car=car, summary=summary, abnormal=abnormal)
@@ -1,8 +1,13 @@
 # events.py 
-import streamlit as st
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import pandas as pd
-import feedparser
-from datetime import datetime
+from datetime import date, datetime, timedelta
+import event_store
+import telemetry
+from keyword_matcher import KeywordMatcher
 
 # --------- RSS Sources ---------
 RSS_FEEDS = [
@@ -11,6 +16,16 @@ RSS_FEEDS = [
     "http://feeds.reuters.com/reuters/topNews"
 ]
 
+# --------- Feed Fetching ---------
+FEED_TIMEOUT = 10    # ثواني لكل مصدر
+FEED_TTL = 600       # ثواني قبل ما نسأل المصدر تاني
+FEED_WORKERS = 8
+FEED_HEADERS = {"User-Agent": "GeopoliticalTensionIndex/1.0 (+feedparser)"}
+
+# url -> {"etag", "modified", "title", "entries", "fetched_at"}
+_FEED_CACHE = {}
+_FEED_LOCK = threading.Lock()
+
 # --------- Default Keywords ---------
 DEFAULT_KEYWORDS = ["geopolitics", "economic", "war", "conflict", "trade", "sanctions"]
 
@@ -23,42 +38,148 @@ RISK_KEYWORDS = {
 
 RISK_ORDER = {"High": 1, "Medium": 2, "Low": 3}
 
+# الـ RSS فيه آخر كام يوم بس، فلو المدى المطلوب أقدم من كده نقرا من المخزن من غير شبكة
+RSS_WINDOW_DAYS = 7
+
+@lru_cache(maxsize=32)
+def get_matcher(keywords: tuple = tuple(DEFAULT_KEYWORDS)) -> KeywordMatcher:
+    return KeywordMatcher(keywords, RISK_KEYWORDS)
+
 def classify_risk(title: str) -> str:
     """تحديد مستوى الخطورة من عنوان الخبر"""
-    title_lower = title.lower()
-    for risk, keywords in RISK_KEYWORDS.items():
-        if any(k in title_lower for k in keywords):
-            return risk
-    return "Low"
+    return get_matcher().risk(title)
 
-def fetch_events(start_date, end_date, keywords=None):
-    if keywords is None:
-        keywords = DEFAULT_KEYWORDS
-    
-    all_events = []
-    for feed_url in RSS_FEEDS:
-        feed = feedparser.parse(feed_url)
-        for entry in feed.entries:
+def _parse_feed(content) -> tuple[str, list]:
+    import feedparser
+    feed = feedparser.parse(content)
+    title = feed.feed.get("title", "Unknown")
+    entries = [
+        {
+            "title": e.get("title", ""),
+            "link": e.get("link", ""),
+            "published_parsed": e.get("published_parsed"),
+            "source": e.get("source", title),
+        }
+        for e in feed.entries
+    ]
+    return title, entries
+
+def _fetch_feed(url, timeout=FEED_TIMEOUT, ttl=FEED_TTL) -> dict:
+    """
+    تحميل مصدر RSS واحد مع كاش: خلال الـ TTL مفيش أي طلب،
+    وبعده طلب مشروط (ETag / Last-Modified) فلو المصدر متغيرش بيرجع 304 بس.
+    """
+    with telemetry.span("events.fetch_feed") as sp:
+        result = _load_feed(url, timeout, ttl, sp)
+        sp.rows = len(result["entries"])
+    return result
+
+def _load_feed(url, timeout, ttl, sp) -> dict:
+    with _FEED_LOCK:
+        cached = _FEED_CACHE.get(url)
+    now = time.monotonic()
+    sp.cache = "miss"
+    if cached and now - cached["fetched_at"] < ttl:
+        sp.cache = "hit"
+        return cached
+
+    headers = dict(FEED_HEADERS)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("modified"):
+            headers["If-Modified-Since"] = cached["modified"]
+
+    import requests
+    try:
+        r = requests.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        return cached or {"title": "Unknown", "entries": []}
+
+    if r.status_code == 304 and cached:
+        sp.cache = "hit"
+        result = {**cached, "fetched_at": now}
+    elif r.ok:
+        title, entries = _parse_feed(r.content)
+        result = {
+            "etag": r.headers.get("ETag"),
+            "modified": r.headers.get("Last-Modified"),
+            "title": title,
+            "entries": entries,
+            "fetched_at": now,
+        }
+    else:
+        return cached or {"title": "Unknown", "entries": []}
+
+    with _FEED_LOCK:
+        _FEED_CACHE[url] = result
+    return result
+
+def fetch_feeds(feeds=None) -> list:
+    """كل المصادر بالتوازي، وكل مصدر ليه timeout خاص بيه"""
+    feeds = list(feeds or RSS_FEEDS)
+    if not feeds:
+        return []
+    with ThreadPoolExecutor(max_workers=min(FEED_WORKERS, len(feeds))) as pool:
+        return list(pool.map(telemetry.bind(_fetch_feed), feeds))
+
+def _dated_entries(feeds=None):
+    for feed in fetch_feeds(feeds):
+        for entry in feed["entries"]:
             # تاريخ النشر
             try:
-                pub_date = datetime(*entry.published_parsed[:6])
+                pub_date = datetime(*entry["published_parsed"][:6])
             except:
                 continue
+            yield pub_date.date(), entry
 
-            # ضمن الفترة المحددة؟
-            if not (start_date <= pub_date.date() <= end_date):
-                continue
+def ingest_events(feeds=None, path: str = event_store.EVENTS_DB) -> int:
+    """
+    تخزين كل أخبار المصادر في مخزن الأحداث (من غير فلترة بالكلمات،
+    عشان أي كلمات تتطلب بعدين تلاقي التاريخ كله). بيرجع عدد الأخبار الجديدة.
+    """
+    entries = list(_dated_entries(feeds))
+    with telemetry.span("events.ingest", rows=len(entries)):
+        scanned = get_matcher().scan_many([e["title"] for _, e in entries])
+        events = [
+            {"Date": d, "Title": e["title"], "Source": e["source"], "Link": e["link"], "Risk": risk}
+            for (d, e), risk in zip(entries, scanned["Risk"])
+        ]
+        return event_store.add_events(events, RISK_ORDER, path=path)
+
+def query_events(start_date, end_date, keywords=None, path: str = event_store.EVENTS_DB) -> pd.DataFrame:
+    """نفس شكل fetch_events بس من المخزن المحلي (استعلام بالمدى على فهرس التاريخ)"""
+    if keywords is None:
+        keywords = DEFAULT_KEYWORDS
+    with telemetry.span("events.query") as sp:
+        df = event_store.query_events(start_date, end_date, path=path)
+        sp.rows = len(df)
+        if df.empty:
+            return pd.DataFrame(columns=["Date", "Title", "Source", "Link", "Risk"])
+        keep = get_matcher(tuple(keywords)).scan_many(df["Title"])["match"]
+        return df[keep.to_numpy()]
+
+def fetch_events(start_date, end_date, keywords=None, feeds=None):
+    if keywords is None:
+        keywords = DEFAULT_KEYWORDS
+    
+    with telemetry.span("events.fetch_events") as sp:
+        candidates = [(d, e) for d, e in _dated_entries(feeds) if start_date <= d <= end_date]
 
-            # النص يحتوي أي keyword؟
-            if any(k.lower() in entry.title.lower() for k in keywords):
-                risk_level = classify_risk(entry.title)
-                all_events.append({
-                    "Date": pub_date.date(),
-                    "Title": entry.title,
-                    "Source": entry.get("source", feed.feed.get("title","Unknown")),
-                    "Link": entry.link,
-                    "Risk": risk_level
-                })
+        # الفلترة بالكلمات ومستوى الخطورة في مسح واحد لكل العناوين
+        scanned = get_matcher(tuple(keywords)).scan_many([e["title"] for _, e in candidates])
+        all_events = [
+            {
+                "Date": d,
+                "Title": entry["title"],
+                "Source": entry["source"],
+                "Link": entry["link"],
+                "Risk": risk_level
+            }
+            for (d, entry), keep, risk_level in zip(candidates, scanned["match"], scanned["Risk"])
+            if keep
+        ]
+        sp.rows = len(candidates)
     
     if not all_events:
         return pd.DataFrame(columns=["Date", "Title", "Source", "Link", "Risk"])
@@ -70,8 +191,11 @@ def fetch_events(start_date, end_date, keywords=None):
     return df
 
 def show_events_table(start_date, end_date, keywords=None):
+    import streamlit as st
     try:
-        df = fetch_events(start_date, end_date, keywords)
+        if end_date >= date.today() - timedelta(days=RSS_WINDOW_DAYS):
+            ingest_events()
+        df = query_events(start_date, end_date, keywords)
         if df.empty:
             st.info("No events found for the selected date range.")
             return
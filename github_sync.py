@@ -0,0 +1,195 @@
+# github_sync.py
+# رفع ملفات الأوزان على GitHub (contents API) في thread في الخلفية بدل ما الواجهة تستنى.
+# التعديلات المتتالية على نفس الملف خلال SYNC_DELAY ثانية بتتجمع في commit واحد (آخر نسخة بس).
+import base64
+import hashlib
+import threading
+import time
+
+API_BASE = "https://api.github.com"
+SYNC_DELAY = 2.0       # ثواني هدوء قبل الرفع (تجميع التعديلات)
+SYNC_TIMEOUT = 15      # ثواني لكل طلب
+SYNC_RETRIES = 3
+SYNC_BACKOFF = 1.0     # ثواني، بتتضاعف مع كل محاولة
+SYNC_POOL = 4          # اتصالات مفتوحة في الـ session
+
+class SyncError(Exception):
+    pass
+
+def blob_sha(content: bytes) -> str:
+    """نفس الـ sha اللي GitHub بيحسبه للملف، فنعرف من غير طلب لو المحتوى متغيرش"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+class GitHubSync:
+    """
+    طابور commits في الخلفية:
+      sync.submit("stocks_weights.csv", csv_text, "Update weights")   # بيرجع فورًا
+      sync.status("stocks_weights.csv")  # {"state": "pending"|"pushing"|"ok"|"error"|"idle", ...}
+    - session واحدة (connection pooling) لكل الطلبات
+    - آخر sha معروف لكل ملف محفوظ، فمفيش GET قبل كل PUT؛ لو الـ sha قديم (409/422) بنجيبه تاني
+    - أخطاء الشبكة و 5xx و 429 بتتعاد بـ backoff
+    """
+
+    def __init__(self, token: str, repo: str, branch: str = "main", api_base: str = API_BASE,
+                 delay: float = SYNC_DELAY, on_result=None):
+        self.token, self.repo, self.branch = token, repo, branch
+        self.api_base = api_base.rstrip("/")
+        self.delay = delay
+        self.on_result = on_result
+        self._session = None
+        self._sha = {}        # path -> آخر sha معروف على الفرع
+        self._pending = {}    # path -> (content, message, submitted_at, edits)
+        self._status = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="github-sync", daemon=True)
+        self._thread.start()
+
+    # ---------- Public API ----------
+    def submit(self, path: str, content: str, message: str):
+        with self._cond:
+            edits = self._pending[path][3] + 1 if path in self._pending else 1
+            self._pending[path] = (content, message, time.monotonic(), edits)
+            self._set_status(path, "pending", f"{edits} edit(s) queued")
+            self._cond.notify_all()
+
+    def status(self, path: str | None = None) -> dict:
+        with self._cond:
+            if path is not None:
+                return dict(self._status.get(path, {"state": "idle", "message": ""}))
+            return {p: dict(s) for p, s in self._status.items()}
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """يستنى لحد ما الطابور يفضى (من غير انتظار SYNC_DELAY)؛ بيرجع False لو الوقت خلص"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._pending = {p: (c, m, 0.0, n) for p, (c, m, _, n) in self._pending.items()}
+            self._cond.notify_all()
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float | None = 10):
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self._session is not None:
+            self._session.close()
+
+    # ---------- Worker ----------
+    def _set_status(self, path, state, message):
+        self._status[path] = {"state": state, "message": message, "updated_at": time.time()}
+
+    def _next_batch(self) -> dict | None:
+        """بيستنى لحد ما ملف يعدّي عليه delay من غير تعديل جديد، وبيسحبه من الطابور"""
+        with self._cond:
+            while True:
+                if self._closed and not self._pending:
+                    return None
+                now = time.monotonic()
+                ready = {p: v for p, v in self._pending.items() if now - v[2] >= self.delay}
+                if ready:
+                    for p in ready:
+                        del self._pending[p]
+                        self._set_status(p, "pushing", "Committing to GitHub...")
+                    self._busy = True
+                    return ready
+                waits = [self.delay - (now - v[2]) for v in self._pending.values()]
+                self._cond.wait(min(waits) if waits else None)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            for path, (content, message, _, edits) in batch.items():
+                try:
+                    result = self._push(path, content, message)
+                    state, msg = "ok", f"{result} ({edits} edit(s))"
+                except Exception as e:
+                    state, msg = "error", str(e)
+                with self._cond:
+                    # لو اتعمل submit جديد أثناء الرفع، الحالة تفضل pending
+                    if path not in self._pending:
+                        self._set_status(path, state, msg)
+                if self.on_result:
+                    try:
+                        self.on_result(path, state, msg)
+                    except Exception:
+                        pass
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    # ---------- HTTP ----------
+    def _http(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            s = requests.Session()
+            s.mount("https://", HTTPAdapter(pool_connections=SYNC_POOL, pool_maxsize=SYNC_POOL))
+            s.mount("http://", HTTPAdapter(pool_connections=SYNC_POOL, pool_maxsize=SYNC_POOL))
+            s.headers.update({"Authorization": f"token {self.token}", "Accept": "application/vnd.github.v3+json"})
+            self._session = s
+        return self._session
+
+    def _url(self, path):
+        return f"{self.api_base}/repos/{self.repo}/contents/{path}"
+
+    def _request(self, method, path, **kwargs):
+        """طلب واحد مع retry/backoff لأخطاء الشبكة و 5xx و 429"""
+        import requests
+        for attempt in range(SYNC_RETRIES + 1):
+            try:
+                r = self._http().request(method, self._url(path), timeout=SYNC_TIMEOUT, **kwargs)
+                if r.status_code < 500 and r.status_code != 429:
+                    return r
+                error = f"GitHub API error: {r.status_code} {r.text[:200]}"
+            except requests.RequestException as e:
+                error = f"GitHub request failed: {e}"
+            if attempt < SYNC_RETRIES:
+                time.sleep(SYNC_BACKOFF * 2 ** attempt)
+        raise SyncError(error)
+
+    def _remote_sha(self, path):
+        r = self._request("GET", path, params={"ref": self.branch})
+        if r.status_code == 404:
+            return None
+        if r.status_code != 200:
+            raise SyncError(f"GitHub API error: {r.status_code} {r.text[:200]}")
+        return r.json().get("sha")
+
+    def _push(self, path, content: str, message: str) -> str:
+        data = content.encode("utf-8")
+        # الـ sha المحفوظ بيتبعت بس كشرط للـ PUT؛ "مفيش تغيير" لازم يتأكد من GitHub نفسه
+        # (الملف ممكن يكون اتعدّل من برّه بعد آخر رفع)
+        if path not in self._sha or self._sha[path] == blob_sha(data):
+            self._sha[path] = self._remote_sha(path)
+            if self._sha[path] == blob_sha(data):
+                return "Already up to date"
+
+        payload = {"message": message, "content": base64.b64encode(data).decode(), "branch": self.branch}
+        for attempt in range(2):
+            if self._sha[path]:
+                payload["sha"] = self._sha[path]
+            else:
+                payload.pop("sha", None)
+            r = self._request("PUT", path, json=payload)
+            if r.status_code in (200, 201):
+                self._sha[path] = (r.json().get("content") or {}).get("sha") or blob_sha(data)
+                return "Committed"
+            if r.status_code in (409, 422) and attempt == 0:
+                # الـ sha المحفوظ قديم (حد عدّل الملف من برّه)
+                self._sha[path] = self._remote_sha(path)
+                if self._sha[path] == blob_sha(data):
+                    return "Already up to date"
+                continue
+            break
+        self._sha.pop(path, None)
+        raise SyncError(f"GitHub API error: {r.status_code} {r.text[:200]}")
@@ -0,0 +1,72 @@
+# gti_bootstrap.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from gti_engine import signed_weights
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# ---------- Simulation ----------
+def _simulate_batch(R: np.ndarray, base: np.ndarray, signs: np.ndarray, n_paths: int,
+                    weight_sigma: float, seed) -> np.ndarray:
+    """
+    دفعة مسارات (أيام × مسارات) للمؤشر المطبّع 0–100:
+    - أوزان مشوّشة: كل وزن مضروب في lognormal بمتوسط 1، وبعدين تطبيع تاني
+    - عوائد معاد تعيينها (Bayesian bootstrap): كل يوم ليه وزن Exp(1) فالمسار بيفضل على نفس التواريخ
+    """
+    rng = np.random.default_rng(seed)
+    noise = np.exp(weight_sigma * rng.standard_normal((n_paths, len(base))) - weight_sigma ** 2 / 2)
+    W = base * noise
+    W = W / W.sum(axis=1, keepdims=True) * signs
+
+    G = rng.standard_exponential((len(R), n_paths))
+    paths = np.cumsum((R @ W.T) * G, axis=0)
+
+    lo, hi = paths.min(axis=0), paths.max(axis=0)
+    span = hi - lo
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(span > 0, (paths - lo) / span * 100, 50.0)
+    return out
+
+_WORKER = {}
+
+def _init_worker(R, base, signs, weight_sigma):
+    _WORKER.update(R=R, base=base, signs=signs, weight_sigma=weight_sigma)
+
+def _worker_batch(job):
+    n_paths, seed = job
+    w = _WORKER
+    return _simulate_batch(w["R"], w["base"], w["signs"], n_paths, w["weight_sigma"], seed)
+
+# ---------- Public API ----------
+def bootstrap_bands(prices: pd.DataFrame, weights: pd.DataFrame, n_paths: int = 2000,
+                    weight_sigma: float = 0.2, percentiles=PERCENTILES, batch_size: int = 250,
+                    n_jobs: int = 1, seed: int = 0) -> pd.DataFrame:
+    """
+    نطاقات ثقة (percentiles) للمؤشر المطبّع من n_paths مسار معاد تعيينه.
+    المسارات بتتحسب على دفعات batch_size، وكل دفعة ليها seed مشتق من seed الأساسي
+    (SeedSequence.spawn)، فالنتيجة واحدة مهما كان n_jobs.
+    """
+    returns = prices.pct_change(fill_method=None).dropna(how="all")
+    symbols = list(dict.fromkeys(s for s in weights["symbol"] if s in returns.columns))
+    signed = signed_weights(weights, symbols)
+    base, signs = np.abs(signed), np.sign(signed)
+    R = np.nan_to_num(returns[symbols].to_numpy(dtype="float64"))
+
+    sizes = [min(batch_size, n_paths - i) for i in range(0, n_paths, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = list(zip(sizes, seeds))
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(R, base, signs, weight_sigma)) as pool:
+            parts = list(pool.map(_worker_batch, jobs))
+    else:
+        parts = [_simulate_batch(R, base, signs, n, weight_sigma, s) for n, s in jobs]
+
+    paths = np.hstack(parts)
+    bands = np.percentile(paths, percentiles, axis=1).T
+    return pd.DataFrame(bands, index=returns.index, columns=[f"p{p}" for p in percentiles])
@@ -0,0 +1,172 @@
+# gti_cli.py
+# تشغيل من غير Streamlit (cron / أنظمة تانية):
+#   python gti_cli.py gti     --start 2024-01-01 --end 2024-12-31 --out gti.parquet
+#   python gti_cli.py markets --start 2024-01-01 --end 2024-12-31 --today 2024-12-30 --out markets.csv
+#   python gti_cli.py events  --start 2024-12-01 --end 2024-12-31 --refresh --out events.json
+#   python gti_cli.py event-study --start 2024-01-01 --end 2024-12-31 --table car --out car.csv
+# المكتبات التقيلة (plotly/streamlit/feedparser/requests/yfinance) مش بتتحمل غير لو الأمر محتاجها.
+import argparse
+import sys
+from datetime import date, timedelta
+
+WEIGHTS_FILE = "stocks_weights.csv"
+
+def _date(s: str) -> date:
+    return date.fromisoformat(s)
+
+def _write(df, out, fmt=None):
+    if not out or out == "-":
+        fmt = fmt or "csv"
+        if fmt == "json":
+            df.to_json(sys.stdout, orient="records", date_format="iso", indent=2)
+            sys.stdout.write("\n")
+        elif fmt == "csv":
+            df.to_csv(sys.stdout, index=False)
+        else:
+            raise SystemExit(f"Cannot write {fmt} to stdout; use --out <file>.{fmt}")
+        return
+    fmt = fmt or out.rsplit(".", 1)[-1].lower()
+    if fmt == "parquet":
+        try:
+            df.to_parquet(out, index=False)
+        except ImportError:
+            # pyarrow/fastparquet مش في requirements.txt (الواجهة مش محتاجاهم)
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow (or use --out <file>.csv/.json)")
+    elif fmt == "json":
+        df.to_json(out, orient="records", date_format="iso", indent=2)
+    elif fmt == "csv":
+        df.to_csv(out, index=False)
+    else:
+        raise SystemExit(f"Unsupported output format: {fmt}")
+
+# ---------- Commands ----------
+def cmd_gti(args):
+    import pandas as pd
+    import price_store
+    from gti_engine import GTIAccumulator, compute_gti, load_weights, normalization_lookback, normalize_windows
+
+    weights = load_weights(args.weights)
+    # مع --windows بنحمّل lookback قبل البداية عشان النوافذ المتحركة تبقى كاملة من أول يوم
+    fetch_start = args.start - timedelta(days=normalization_lookback()) if args.windows else args.start
+    history = price_store.load_close(weights["symbol"].tolist(), fetch_start, args.end).dropna(how="all", axis=1)
+    prices = history[history.index >= pd.Timestamp(args.start)]
+    if prices.empty:
+        raise SystemExit("No price data available.")
+
+    if args.state:
+        # وضع تراكمي: نكمّل من آخر حالة محفوظة بدل ما نعيد حساب التاريخ كله
+        try:
+            acc = GTIAccumulator.load(args.state)
+        except FileNotFoundError:
+            acc = None
+        available = [s for s in weights["symbol"] if s in prices.columns]
+        if acc is not None and not acc.matches(weights, available):
+            # الأوزان أو الرموز اتغيرت من وقت ما الحالة اتحفظت: نبنيها من جديد
+            print(f"State {args.state} does not match {args.weights}; rebuilding.", file=sys.stderr)
+            acc = None
+        if acc is None:
+            acc = GTIAccumulator.from_prices(prices, weights)
+        else:
+            acc.update(prices)
+        acc.save(args.state)
+        raw, normalized = acc.raw_series(), acc.normalized_series()
+    else:
+        gti = compute_gti(prices, weights)
+        raw, normalized = gti.raw, gti.normalized
+
+    df = pd.DataFrame({"Date": raw.index, "raw": raw.to_numpy(), "GTI": normalized.to_numpy()})
+    if args.windows:
+        table = normalize_windows(compute_gti(history, weights).raw, start=args.start).drop(columns="full")
+        df = df.merge(table.add_prefix("GTI_"), left_on="Date", right_index=True, how="left")
+    if args.bands:
+        from gti_bootstrap import bootstrap_bands
+        bands = bootstrap_bands(prices, weights, n_paths=args.bands, n_jobs=args.jobs, seed=args.seed)
+        df = df.merge(bands, left_on="Date", right_index=True, how="left")
+    _write(df, args.out, args.format)
+
+def cmd_markets(args):
+    from index_analysis import MARKETS_FILE, attach_color_classes, build_results
+    df = build_results(args.start, args.end, args.today or args.end, markets_path=args.markets or MARKETS_FILE)
+    _write(attach_color_classes(df), args.out, args.format)
+
+def cmd_events(args):
+    import events
+    if args.refresh:
+        events.ingest_events()
+    df = events.query_events(args.start, args.end, args.keywords)
+    _write(df, args.out, args.format)
+
+def cmd_event_study(args):
+    import pandas as pd
+    import events
+    import price_store
+    from event_study import event_study, study_inputs
+    from gti_engine import compute_gti, load_weights
+    from index_analysis import MARKETS_FILE, download_closes, load_markets
+
+    # تاريخ كفاية قبل أول حدث لنافذة التقدير (شموع تداول → أيام تقويمية بهامش)
+    fetch_start = args.start - timedelta(days=2 * (args.estimation + args.pre) + 7)
+    fetch_end = args.end + timedelta(days=2 * args.post + 7)
+    weights = load_weights(args.weights)
+    prices = price_store.load_close(weights["symbol"].tolist(), fetch_start, fetch_end).dropna(how="all", axis=1)
+    if prices.empty:
+        raise SystemExit("No price data available.")
+    markets = load_markets(args.markets or MARKETS_FILE)
+    closes = download_closes(markets["YahooTicker"].tolist(), fetch_start, fetch_end)
+
+    changes = study_inputs(compute_gti(prices, weights).raw, closes)
+    evts = events.query_events(args.start, args.end, args.keywords)
+    if evts.empty:
+        raise SystemExit("No events in range.")
+    result = event_study(evts, changes, pre=args.pre, post=args.post, estimation=args.estimation)
+    table = {"car": result.car, "summary": result.summary, "events": result.abnormal}[args.table]
+    _write(table.reset_index() if args.table != "events" else table, args.out, args.format)
+
+# ---------- Entry Point ----------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="gti_cli", description="Geopolitical Tension Index - headless mode")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    today = date.today()
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--start", type=_date, default=today - timedelta(days=365))
+    common.add_argument("--end", type=_date, default=today)
+    common.add_argument("--out", default="-", help="output file (.csv/.json/.parquet), '-' for stdout")
+    common.add_argument("--format", choices=["csv", "json", "parquet"], help="override the format implied by --out")
+
+    p = sub.add_parser("gti", parents=[common], help="compute the GTI series")
+    p.add_argument("--weights", default=WEIGHTS_FILE)
+    p.add_argument("--state", help="JSON state file for incremental updates")
+    p.add_argument("--bands", type=int, default=0, metavar="N", help="add percentile bands from N resampled paths")
+    p.add_argument("--jobs", type=int, default=1, help="processes for --bands (-1 = all cores)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--windows", action="store_true", help="add rolling-window normalized columns (30d/90d/365d/expanding)")
+    p.set_defaults(func=cmd_gti)
+
+    p = sub.add_parser("markets", parents=[common], help="world-map result table (build_results)")
+    p.add_argument("--today", type=_date)
+    p.add_argument("--markets")
+    p.set_defaults(func=cmd_markets)
+
+    p = sub.add_parser("events", parents=[common], help="events table from the local event store")
+    p.add_argument("--keywords", nargs="*")
+    p.add_argument("--refresh", action="store_true", help="ingest the RSS feeds before querying")
+    p.set_defaults(func=cmd_events)
+
+    p = sub.add_parser("event-study", parents=[common], help="abnormal GTI/market moves around stored events by risk tier")
+    p.add_argument("--weights", default=WEIGHTS_FILE)
+    p.add_argument("--markets")
+    p.add_argument("--keywords", nargs="*")
+    p.add_argument("--pre", type=int, default=5, help="bars before the event")
+    p.add_argument("--post", type=int, default=5, help="bars after the event")
+    p.add_argument("--estimation", type=int, default=60, help="bars used to estimate the normal move")
+    p.add_argument("--table", choices=["summary", "car", "events"], default="summary")
+    p.set_defaults(func=cmd_event_study)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# gti_engine.py
+import json
+import os
+from collections import deque
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+class GTIResult(NamedTuple):
+    raw: pd.Series            # المؤشر التراكمي قبل التطبيع
+    normalized: pd.Series     # المؤشر من 0 لـ 100
+    contributions: pd.DataFrame  # مساهمة كل رمز في العائد اليومي الموزون
+
+# نوافذ التطبيع بالأيام (تقويمية): قيمة اليوم بتتقارن بالـ min/max في آخر N يوم بس،
+# فمش بتتغير لما تاريخ البداية يتغير. None = من أول التاريخ لحد اليوم (expanding)
+NORMALIZATION_WINDOWS = {"30d": 30, "90d": 90, "365d": 365, "expanding": None}
+
+# ---------- Helpers ----------
+def load_weights(path: str) -> pd.DataFrame:
+    """
+    قراءة ملف الأوزان (symbol, weight, positive) بأي حالة أحرف للأعمدة.
+    بيرفع ValueError لو الملف أو عمود ناقص.
+    """
+    if not os.path.exists(path):
+        raise ValueError(f"Weights file not found: {path}")
+    df = pd.read_csv(path)
+    df.columns = [c.strip() for c in df.columns]
+    cols_lower = {c.lower(): c for c in df.columns}
+    for col in ["symbol", "weight", "positive"]:
+        if col not in cols_lower:
+            raise ValueError(f"Column '{col}' missing in CSV.")
+    df = df.rename(columns={cols_lower["symbol"]: "symbol",
+                            cols_lower["weight"]: "weight",
+                            cols_lower["positive"]: "positive"})
+    if "full_name" not in df.columns:
+        df["full_name"] = df["symbol"]
+    df["weight"] = pd.to_numeric(df["weight"], errors="coerce").fillna(0.0)
+    df["positive"] = df["positive"].astype(int)
+    return df
+
+def signed_weights(weights: pd.DataFrame, symbols) -> np.ndarray:
+    """
+    أوزان موقّعة ومطبّعة بنفس ترتيب symbols:
+    weight / مجموع الأوزان، والإشارة سالبة لو positive != 1
+    """
+    w = weights.drop_duplicates("symbol", keep="last").set_index("symbol").reindex(list(symbols))
+    vals = w["weight"].to_numpy(dtype="float64")
+    signs = np.where(w["positive"].astype(int).to_numpy() == 1, 1.0, -1.0)
+    return vals / vals.sum() * signs
+
+def normalize_minmax(series: pd.Series) -> pd.Series:
+    min_v, max_v = series.min(), series.max()
+    if max_v != min_v:
+        return (series - min_v) / (max_v - min_v) * 100
+    return pd.Series(50.0, index=series.index)
+
+def rolling_minmax(values: np.ndarray, dates, windows: dict) -> dict:
+    """
+    min/max متحركين لكل نافذة في windows، كلهم في لفة واحدة على البيانات (O(n)):
+    لكل نافذة deque رتيب للـ min وواحد للـ max، وأي عنصر بيدخل ويخرج مرة واحدة بس.
+    بيرجع dict من اسم النافذة لـ (lo, hi).
+    """
+    values = np.asarray(values, dtype="float64")
+    days = pd.DatetimeIndex(dates).to_numpy(dtype="datetime64[D]").astype("int64")
+    n = len(values)
+    out = {name: (np.full(n, np.nan), np.full(n, np.nan)) for name in windows}
+    state = [(name, span, deque(), deque(), *out[name]) for name, span in windows.items()]
+
+    for i in range(n):
+        v = values[i]
+        if np.isnan(v):
+            continue
+        for name, span, dq_min, dq_max, lo, hi in state:
+            while dq_min and values[dq_min[-1]] >= v:
+                dq_min.pop()
+            dq_min.append(i)
+            while dq_max and values[dq_max[-1]] <= v:
+                dq_max.pop()
+            dq_max.append(i)
+            if span is not None:
+                cutoff = days[i] - span
+                while days[dq_min[0]] <= cutoff:
+                    dq_min.popleft()
+                while days[dq_max[0]] <= cutoff:
+                    dq_max.popleft()
+            lo[i], hi[i] = values[dq_min[0]], values[dq_max[0]]
+    return out
+
+def normalization_lookback(windows: dict = NORMALIZATION_WINDOWS) -> int:
+    """عدد الأيام الإضافية اللي محتاجينها قبل تاريخ البداية عشان أطول نافذة تبقى كاملة"""
+    return max((d for d in windows.values() if d is not None), default=0)
+
+def normalize_windows(raw: pd.Series, windows: dict = NORMALIZATION_WINDOWS, start=None) -> pd.DataFrame:
+    """
+    جدول واحد (Date × نافذة) فيه المؤشر مطبّع 0–100 على كل نافذة متحركة،
+    بالإضافة لعمود "full" (التطبيع القديم: min/max المدى المعروض كله).
+    لو start موجود، اللي قبله بيتستخدم كـ lookback للنوافذ بس ومش بيظهر في الجدول.
+    """
+    values = raw.to_numpy(dtype="float64")
+    table = {}
+    for name, (lo, hi) in rolling_minmax(values, raw.index, windows).items():
+        span = hi - lo
+        with np.errstate(divide="ignore", invalid="ignore"):
+            table[name] = np.where(span > 0, (values - lo) / span * 100, np.where(np.isnan(span), np.nan, 50.0))
+    table = pd.DataFrame(table, index=raw.index)
+    if start is not None:
+        table = table[table.index >= pd.Timestamp(start)]
+    table["full"] = normalize_minmax(raw.reindex(table.index))
+    return table
+
+# ---------- Public API ----------
+def compute_gti(prices: pd.DataFrame, weights: pd.DataFrame) -> GTIResult:
+    """
+    حساب مؤشر GTI من جدول أسعار (Date × Symbol) وجدول أوزان فيه symbol, weight, positive.
+    الجمع الموزون بيتعمل كضرب مصفوفة × متجه واحد.
+    """
+    returns = prices.pct_change(fill_method=None).dropna(how="all")
+    available = [s for s in weights["symbol"] if s in returns.columns]
+    available = list(dict.fromkeys(available))
+    w = signed_weights(weights, available)
+
+    r = returns[available].to_numpy(dtype="float64")
+    r = np.where(np.isnan(r), 0.0, r)
+    daily = r @ w
+
+    raw = pd.Series(np.cumsum(daily), index=returns.index)
+    contributions = pd.DataFrame(r * w, index=returns.index, columns=available)
+    return GTIResult(raw=raw, normalized=normalize_minmax(raw), contributions=contributions)
+
+# ---------- Incremental Mode ----------
+class GTIAccumulator:
+    """
+    نسخة تراكمية من compute_gti: كل update بياخد صفوف أسعار جديدة بس
+    ويحدّث المؤشر التراكمي والـ min/max في O(عدد الصفوف الجديدة).
+    التطبيع للتاريخ كله بيتحسب وقت الطلب من raw + min/max الحاليين،
+    فلو قيمة جديدة كسرت الـ min/max، القيم القديمة بتتعاد تطبيعها تلقائيًا.
+    """
+
+    def __init__(self, weights: pd.DataFrame, symbols):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.w = signed_weights(weights, self.symbols)
+        self.last_prices = None
+        self.last_date = None
+        self.dates = []
+        self.raw = []
+        self.min_v = None
+        self.max_v = None
+        self.renormalized = False
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, weights: pd.DataFrame) -> "GTIAccumulator":
+        symbols = [s for s in weights["symbol"] if s in prices.columns]
+        acc = cls(weights, symbols)
+        acc.update(prices)
+        return acc
+
+    def matches(self, weights: pd.DataFrame, symbols) -> bool:
+        """
+        الحالة لسه بتمثّل ملف الأوزان ده؟ نفس الأوزان الموقّعة لرموزها، ومفيش رمز جديد
+        في symbols (الرموز اللي ليها أسعار دلوقتي) مش موجود فيها.
+        """
+        if not set(symbols) <= set(self.symbols):
+            return False
+        w = signed_weights(weights, self.symbols)
+        return w.shape == self.w.shape and bool(np.allclose(w, self.w, rtol=0, atol=1e-12))
+
+    def update(self, prices: pd.DataFrame) -> pd.Series:
+        """إضافة صفوف أسعار جديدة، وبيرجع القيم المطبّعة للأيام اللي اتضافت"""
+        prices = prices.sort_index()
+        if self.last_date is not None:
+            prices = prices[prices.index > self.last_date]
+        if prices.empty:
+            self.renormalized = False
+            return pd.Series(dtype="float64")
+
+        p = prices.reindex(columns=self.symbols).to_numpy(dtype="float64")
+        prev = p[:-1] if self.last_prices is None else np.vstack([self.last_prices, p[:-1]])
+        if self.last_prices is None:
+            p_rows, index = p[1:], prices.index[1:]
+        else:
+            p_rows, index = p, prices.index
+        self.last_prices = p[-1].copy()
+        self.last_date = prices.index[-1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = p_rows / prev - 1
+        keep = ~np.isnan(r).all(axis=1)
+        r, index = r[keep], index[keep]
+        if len(r) == 0:
+            self.renormalized = False
+            return pd.Series(dtype="float64")
+
+        r = np.where(np.isnan(r), 0.0, r)
+        start = self.raw[-1] if self.raw else 0.0
+        new_raw = start + np.cumsum(r @ self.w)
+
+        old_min, old_max = self.min_v, self.max_v
+        lo, hi = float(new_raw.min()), float(new_raw.max())
+        self.min_v = lo if old_min is None else min(old_min, lo)
+        self.max_v = hi if old_max is None else max(old_max, hi)
+        self.renormalized = old_min is not None and (self.min_v != old_min or self.max_v != old_max)
+
+        self.dates.extend(index)
+        self.raw.extend(new_raw.tolist())
+        return self._normalize(pd.Series(new_raw, index=index))
+
+    def _normalize(self, raw: pd.Series) -> pd.Series:
+        if self.max_v != self.min_v:
+            return (raw - self.min_v) / (self.max_v - self.min_v) * 100
+        return pd.Series(50.0, index=raw.index)
+
+    @property
+    def value(self) -> float | None:
+        """آخر قيمة مطبّعة (0–100)"""
+        if not self.raw:
+            return None
+        return float(self._normalize(pd.Series(self.raw[-1:])).iloc[0])
+
+    def raw_series(self) -> pd.Series:
+        return pd.Series(self.raw, index=pd.DatetimeIndex(self.dates), dtype="float64")
+
+    def normalized_series(self) -> pd.Series:
+        return self._normalize(self.raw_series())
+
+    # ---------- Persistence ----------
+    def to_dict(self) -> dict:
+        last = None if self.last_prices is None else [None if np.isnan(x) else float(x) for x in self.last_prices]
+        return {
+            "symbols": self.symbols,
+            "w": self.w.tolist(),
+            "last_prices": last,
+            "last_date": None if self.last_date is None else pd.Timestamp(self.last_date).isoformat(),
+            "dates": [pd.Timestamp(d).isoformat() for d in self.dates],
+            "raw": self.raw,
+            "min": self.min_v,
+            "max": self.max_v,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "GTIAccumulator":
+        acc = cls.__new__(cls)
+        acc.symbols = list(state["symbols"])
+        acc.w = np.asarray(state["w"], dtype="float64")
+        last = state.get("last_prices")
+        acc.last_prices = None if last is None else np.array([np.nan if x is None else x for x in last], dtype="float64")
+        acc.last_date = None if state.get("last_date") is None else pd.Timestamp(state["last_date"])
+        acc.dates = [pd.Timestamp(d) for d in state["dates"]]
+        acc.raw = list(state["raw"])
+        acc.min_v = state.get("min")
+        acc.max_v = state.get("max")
+        acc.renormalized = False
+        return acc
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "GTIAccumulator":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,258 @@
+# gti_stream.py
+# GTI لحظي من شموع الدقيقة: كل tick بيحدّث المؤشر في O(1) من غير DataFrames،
+# والذاكرة ثابتة (ring buffer بطول ثابت لكل رمز) مهما طالت الجلسة.
+#   stream = StreamingGTI.from_accumulator(GTIAccumulator.from_prices(daily_prices, weights))
+#   stream.start(ReplaySource("ticks.csv"))      # أو YahooMinuteSource(symbols)
+#   stream.snapshot()                            # {"ts", "raw", "value", ...} رخيصة للـ polling
+import csv
+import threading
+import time
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+from gti_engine import GTIAccumulator
+
+BUFFER_SIZE = 390          # دقائق جلسة تداول أمريكية كاملة
+YAHOO_POLL = 60            # ثواني بين كل طلب لشموع الدقيقة
+STREAM_IDLE = 300          # ثواني من غير قراءة (snapshot/history) → Yahoo بيقف لحد القراءة الجاية
+SESSION_TZ = "America/New_York"
+
+def session_date(now: datetime | None = None) -> date:
+    """يوم الجلسة الحالية بتوقيت البورصة (الـ stream بيتعمل من جديد لما يتغير)"""
+    return (now or datetime.now(ZoneInfo(SESSION_TZ))).astimezone(ZoneInfo(SESSION_TZ)).date()
+
+# ---------- Sources ----------
+# المصدر أي iterable بيطلع (timestamp, symbol, price)
+
+class ReplaySource:
+    """
+    إعادة تشغيل ملف CSV فيه ts,symbol,price (مرتب بالوقت).
+    speed=0 أسرع ما يمكن، speed=60 يعني دقيقة بيانات كل ثانية.
+    """
+
+    def __init__(self, path: str, speed: float = 0.0):
+        self.path, self.speed = path, speed
+
+    def __iter__(self):
+        prev = None
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                ts = pd.Timestamp(row["ts"])
+                if self.speed and prev is not None:
+                    time.sleep(max((ts - prev).total_seconds() / self.speed, 0.0))
+                prev = ts
+                yield ts, row["symbol"], float(row["price"])
+
+class YahooMinuteSource:
+    """
+    شموع دقيقة من Yahoo كل YAHOO_POLL ثانية (بيطلع الشموع الجديدة بس، من جلسة day بس).
+    active(): لو رجعت False الطلب بيتخطى (مفيش حد بيتفرج)، ولما ترجع True
+    الطلب الجاي بيجيب كل اللي فات من الجلسة لأن seen محفوظ.
+    """
+
+    def __init__(self, symbols, poll: float = YAHOO_POLL, stop: threading.Event | None = None,
+                 day: date | None = None, active=None):
+        self.symbols = list(symbols)
+        self.poll = poll
+        self.stop = stop or threading.Event()
+        self.day = day
+        self.active = active
+        self.polls = 0
+
+    def _download(self) -> pd.DataFrame:
+        import yfinance as yf
+        raw = yf.download(self.symbols, period="1d", interval="1m", auto_adjust=True, progress=False)
+        close = raw["Close"] if raw is not None and not raw.empty else pd.DataFrame()
+        if isinstance(close, pd.Series):
+            close = close.to_frame(name=self.symbols[0])
+        return close
+
+    def __iter__(self):
+        seen = {}
+        while not self.stop.is_set():
+            bars = []
+            if self.active is None or self.active():
+                self.polls += 1
+                try:
+                    bars = new_bars(self._download(), seen, self.day or session_date())
+                except Exception:
+                    pass
+            yield from bars
+            self.stop.wait(self.poll)
+
+def new_bars(close: pd.DataFrame, seen: dict, day: date | None = None) -> list:
+    """
+    الشموع الجديدة (بعد seen[sym]) لكل الرموز مدمجة ومرتبة بالوقت، فكل نقطة للمؤشر
+    فيها أسعار نفس الدقيقة بس. بيحدّث seen.
+    day: الشموع اللي تاريخها بتوقيت SESSION_TZ مختلف بتتشال (period="1d" ممكن يرجع
+    جلسة امبارح قبل ما السوق يفتح، وأساس الـ stream هو إغلاق امبارح).
+    """
+    if day is not None and len(close):
+        idx = pd.DatetimeIndex(close.index)
+        idx = idx.tz_localize("UTC") if idx.tz is None else idx
+        close = close[idx.tz_convert(SESSION_TZ).date == day]
+    bars = []
+    for sym in close.columns:
+        s = close[sym].dropna()
+        s = s[s.index > seen[sym]] if sym in seen else s
+        bars.extend((ts, sym, float(px)) for ts, px in s.items())
+        if len(s):
+            seen[sym] = s.index[-1]
+    bars.sort(key=lambda bar: bar[0])   # stable: نفس الدقيقة بتفضل بترتيب الرموز
+    return bars
+
+# ---------- Streaming Index ----------
+class StreamingGTI:
+    """
+    المؤشر اللحظي = آخر قيمة raw يومية + Σ wᵢ·(pᵢ/baseᵢ − 1)
+    حيث baseᵢ آخر إغلاق يومي، فده نفس العائد اليومي اللي compute_gti هيحسبه عند الإغلاق.
+    كل tick بيغيّر حد واحد في المجموع، فالتحديث O(1).
+    التطبيع 0–100 بنفس min/max بتوع GTIAccumulator (ممدودين بالقيمة اللحظية).
+    """
+
+    def __init__(self, symbols, w: np.ndarray, base_prices=None, raw_start: float = 0.0,
+                 min_v=None, max_v=None, buffer_size: int = BUFFER_SIZE):
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        k = len(self.symbols)
+        self.w = np.asarray(w, dtype="float64")
+        self.base = np.full(k, np.nan) if base_prices is None else np.asarray(base_prices, dtype="float64").copy()
+        self.last = self.base.copy()
+        # نسخ Python lists للـ tick path (أسرع من indexing في NumPy لعنصر واحد)
+        self._w, self._base, self._last = self.w.tolist(), self.base.tolist(), self.last.tolist()
+        self._live = int(np.isfinite(self.last).sum())
+        self.raw_start = float(raw_start)
+        self.min_v, self.max_v = min_v, max_v
+        self._move = 0.0   # Σ wᵢ·(lastᵢ/baseᵢ − 1)
+
+        # ring buffers ثابتة الحجم: أسعار وأوقات لكل رمز + قيم المؤشر
+        self.buffer_size = buffer_size
+        self.prices = np.full((k, buffer_size), np.nan)
+        self.times = np.zeros((k, buffer_size), dtype="int64")
+        self.pos = np.zeros(k, dtype="int64")
+        self.gti_values = np.full(buffer_size, np.nan)
+        self.gti_times = np.zeros(buffer_size, dtype="int64")
+        self.gti_pos = 0
+        self.ticks = 0
+        self.last_ts = None
+        self.last_read = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._source = None
+        self.error = None
+
+    @classmethod
+    def from_accumulator(cls, acc: GTIAccumulator, buffer_size: int = BUFFER_SIZE) -> "StreamingGTI":
+        """نكمّل من حالة المؤشر اليومي: نفس الأوزان، آخر إغلاق كأساس، ونفس min/max"""
+        raw_start = acc.raw[-1] if acc.raw else 0.0
+        return cls(acc.symbols, acc.w, acc.last_prices, raw_start, acc.min_v, acc.max_v, buffer_size)
+
+    # ---------- Ticks ----------
+    def on_tick(self, ts, symbol: str, price: float) -> bool:
+        i = self.index.get(symbol)
+        if i is None or not np.isfinite(price) or price <= 0:
+            return False
+        t = ts.value if isinstance(ts, pd.Timestamp) else pd.Timestamp(ts).value
+        with self._lock:
+            base = self._base[i]
+            if base != base:
+                # مفيش إغلاق سابق للرمز ده: أول سعر النهارده هو الأساس
+                self.base[i] = self._base[i] = base = price
+            else:
+                prev = self._last[i]
+                self._move += self._w[i] * (price - (base if prev != prev else prev)) / base
+            if self._last[i] != self._last[i]:
+                self._live += 1
+            self.last[i] = self._last[i] = price
+
+            p = self.pos[i] % self.buffer_size
+            self.prices[i, p] = price
+            self.times[i, p] = t
+            self.pos[i] += 1
+
+            # نقطة واحدة للمؤشر لكل timestamp (كل رموز نفس الدقيقة بتحدّث نفس النقطة)
+            if t != self.last_ts:
+                self.gti_pos += 1
+            g = (self.gti_pos - 1) % self.buffer_size
+            self.gti_values[g] = self.raw_start + self._move
+            self.gti_times[g] = t
+            self.ticks += 1
+            self.last_ts = t
+        return True
+
+    def _normalize(self, raw: float) -> float:
+        lo = raw if self.min_v is None else min(self.min_v, raw)
+        hi = raw if self.max_v is None else max(self.max_v, raw)
+        return (raw - lo) / (hi - lo) * 100 if hi != lo else 50.0
+
+    def active(self, idle: float = STREAM_IDLE) -> bool:
+        """حد قرا من الـ stream في آخر idle ثانية؟ (المصادر بتستخدمها عشان توقف الطلبات)"""
+        return time.monotonic() - self.last_read < idle
+
+    def snapshot(self) -> dict:
+        """القراءة الحالية (أرقام بس، من غير نسخ مصفوفات) للـ polling"""
+        self.last_read = time.monotonic()
+        with self._lock:
+            raw = self.raw_start + self._move
+            live = self._live
+            return {
+                "ts": None if self.last_ts is None else pd.Timestamp(self.last_ts),
+                "raw": raw,
+                "value": self._normalize(raw),
+                "move": self._move,
+                "ticks": self.ticks,
+                "symbols_live": live,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "error": self.error,
+            }
+
+    def history(self) -> pd.Series:
+        """قيم المؤشر المطبّعة لآخر buffer_size نقطة زمنية (للرسم)"""
+        self.last_read = time.monotonic()
+        with self._lock:
+            n = min(self.gti_pos, self.buffer_size)
+            order = (self.gti_pos - n + np.arange(n)) % self.buffer_size
+            raw, t = self.gti_values[order].copy(), self.gti_times[order].copy()
+        values = [self._normalize(v) for v in raw]
+        return pd.Series(values, index=pd.to_datetime(t), dtype="float64")
+
+    def symbol_history(self, symbol: str) -> pd.Series:
+        """أسعار الدقيقة لرمز واحد من الـ ring buffer بتاعه (آخر buffer_size tick)"""
+        i = self.index[symbol]
+        with self._lock:
+            n = min(int(self.pos[i]), self.buffer_size)
+            order = (self.pos[i] - n + np.arange(n)) % self.buffer_size
+            prices, t = self.prices[i, order].copy(), self.times[i, order].copy()
+        return pd.Series(prices, index=pd.to_datetime(t), name=symbol, dtype="float64")
+
+    # ---------- Background ----------
+    def run(self, source):
+        for ts, symbol, price in source:
+            if self._stop.is_set():
+                break
+            self.on_tick(ts, symbol, price)
+
+    def start(self, source):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def loop():
+            try:
+                self.run(source)
+            except Exception as e:
+                self.error = str(e)
+
+        self._stop.clear()
+        self._source = source
+        self._thread = threading.Thread(target=loop, name="gti-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        # المصادر اللي بتستنى (زي YahooMinuteSource) ليها stop خاص بيها
+        source_stop = getattr(self._source, "stop", None)
+        if isinstance(source_stop, threading.Event):
+            source_stop.set()
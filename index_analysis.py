@@ -1,14 +1,39 @@
 # index_analysis.py
 import os
 import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+import numpy as np
 import pandas as pd
-import yfinance as yf
-import plotly.express as px
+import price_cache
+import price_store
+import telemetry
 
 # ---------- Config ----------
 MARKETS_FILE = "markets_universe.json"
 
+# التحميل الفردي للتيكرات اللي فشلت في الطلب المجمّع
+FETCH_WORKERS = 8
+FETCH_TIMEOUT = 20      # ثواني لكل تيكر
+FETCH_RETRIES = 2
+FETCH_BACKOFF = 0.5     # ثواني، بتتضاعف مع كل محاولة
+
+# فترات التغيير بالأيام (التغيير اليومي = آخر إغلاق مقابل اللي قبله)
+HORIZONS = {"weekly": 7, "monthly": 30, "yearly": 365}
+RETURN_COLUMNS = ["daily", *HORIZONS]
+
+# كاش النتائج (build_results / plot_world_map) بين الـ reruns
+RESULTS_TTL = 900       # ثواني
+RESULTS_CACHE_SIZE = 32 # أقصى عدد مفاتيح، الأقدم استخدامًا بيتشال
+
+# key -> (created_at, value)
+_RESULTS_CACHE = OrderedDict()
+_RESULTS_LOCK = threading.Lock()
+
 FALLBACK_MARKETS = [
   {"Country": "USA", "MainIndexName": "S&P 500", "YahooTicker": "^GSPC"},
   {"Country": "Germany", "MainIndexName": "DAX Performance Index", "YahooTicker": "^GDAXI"},
@@ -55,15 +80,62 @@ def load_markets(path: str = MARKETS_FILE) -> pd.DataFrame:
     df["ISO3"] = df["Country"].map(ISO3_MAP)
     return df
 
-def _download_close(ticker: str, start, end) -> pd.Series:
+def _download_close(ticker: str, start, end, fetcher=None) -> pd.Series:
     try:
-        df = yf.download(ticker, start=start, end=end, auto_adjust=True, progress=False)
-        if df is None or df.empty or "Close" not in df:
-            return pd.Series(dtype="float64")
-        return df["Close"].dropna()
+        return price_store.load_series(ticker, start, end, fetcher=fetcher)
     except Exception:
         return pd.Series(dtype="float64")
 
+def _download_with_retry(ticker: str, start, end, fetcher=None) -> pd.Series:
+    for attempt in range(FETCH_RETRIES + 1):
+        s = _download_close(ticker, start, end, fetcher)
+        if not s.empty or attempt == FETCH_RETRIES:
+            return s
+        time.sleep(FETCH_BACKOFF * 2 ** attempt)
+
+def _download_each(tickers, start, end, fetcher=None) -> dict:
+    closes = {}
+    pool = ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(tickers)))
+    try:
+        download = telemetry.bind(_download_with_retry)
+        futures = {t: pool.submit(download, t, start, end, fetcher) for t in tickers}
+        for t, fut in futures.items():
+            try:
+                closes[t] = fut.result(timeout=FETCH_TIMEOUT)
+            except Exception:
+                closes[t] = pd.Series(dtype="float64")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return closes
+
+def download_closes(tickers, start, end, fetcher=None) -> dict:
+    """
+    أسعار الإغلاق لكل التيكرات: طلب واحد مجمّع، وبعدين محاولات فردية متوازية
+    (مع retry/backoff) للتيكرات اللي مرجعتش من الطلب المجمّع.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    try:
+        panel = price_cache.load_close(tickers, start, end, fetcher=fetcher)
+    except Exception:
+        panel = pd.DataFrame()
+
+    closes, failed = {}, []
+    for t in tickers:
+        s = panel[t].dropna() if t in panel.columns else pd.Series(dtype="float64")
+        if s.empty:
+            failed.append(t)
+        else:
+            closes[t] = s
+    if failed:
+        with telemetry.span("download_closes.retry", rows=len(failed)):
+            closes.update(_download_each(failed, start, end, fetcher))
+    return {t: closes[t] for t in tickers}
+
+# ---------- Per-Ticker Reference ----------
+# الحساب القديم لتيكر واحد. مش بيتنادى في الكود، بس asof_returns و attach_color_classes
+# لازم يطلعوا نفس النتيجة بالظبط (tests/test_index_analysis.py بيقارن الاتنين).
 def _closest_prior(index: pd.DatetimeIndex, target) -> pd.Timestamp | None:
     ts = pd.to_datetime(target)
     pos = index.searchsorted(ts, side="right") - 1
@@ -105,35 +177,121 @@ def _pct_change_daily(series: pd.Series, asof) -> float | None:
         return None
     return (last_px - prev_px) / prev_px * 100.0
 
+# ---------- Panel Returns ----------
+def build_close_panel(closes: dict) -> pd.DataFrame:
+    """كل أسعار الإغلاق في جدول واحد (Date × Ticker) على اتحاد التواريخ"""
+    series = {t: s[~s.index.duplicated(keep="last")] for t, s in closes.items() if not s.empty}
+    if not series:
+        return pd.DataFrame(columns=list(closes), dtype="float64")
+    panel = pd.DataFrame(series).sort_index()
+    return panel.reindex(columns=list(closes))
+
+def _last_valid_positions(values: np.ndarray) -> np.ndarray:
+    """لكل صف وعمود: رقم آخر صف فيه سعر لحد الصف ده (‎-1 لو مفيش)"""
+    rows = np.arange(len(values))[:, None]
+    return np.maximum.accumulate(np.where(np.isnan(values), -1, rows), axis=0)
+
+def _take(values: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    cols = np.arange(values.shape[1])
+    return np.where(pos >= 0, values[np.maximum(pos, 0), cols], np.nan)
+
+def asof_returns(panel: pd.DataFrame, asof_dates) -> dict:
+    """
+    التغيير اليومي/الأسبوعي/الشهري/السنوي (%) لكل سوق عند كل تاريخ في asof_dates.
+    بيرجع dict من اسم العمود لمصفوفة (عدد التواريخ × عدد الأسواق)،
+    بنفس منطق _pct_change_daily و _pct_change_over بالظبط.
+    """
+    values = panel.to_numpy(dtype="float64")
+    dates = panel.index.to_numpy(dtype="datetime64[ns]")
+    asof = pd.to_datetime(pd.Index(asof_dates)).to_numpy(dtype="datetime64[ns]")
+    if len(dates) == 0:
+        empty = np.full((len(asof), values.shape[1]), np.nan)
+        return {col: empty.copy() for col in RETURN_COLUMNS}
+    last_valid = _last_valid_positions(values)
+    none = np.full((len(asof), values.shape[1]), -1)
+
+    def positions_at(targets):
+        rows = np.searchsorted(dates, targets, side="right") - 1
+        return np.where((rows >= 0)[:, None], last_valid[np.maximum(rows, 0)], none)
+
+    end_pos = positions_at(asof)
+    end_px = _take(values, end_pos)
+
+    out = {}
+    cols = np.arange(values.shape[1])
+    prev_pos = np.where(end_pos >= 1, last_valid[np.maximum(end_pos - 1, 0), cols], -1)
+    prev_px = _take(values, prev_pos)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["daily"] = np.where(prev_px != 0, (end_px - prev_px) / prev_px * 100.0, np.nan)
+        for name, days in HORIZONS.items():
+            start_px = _take(values, positions_at(asof - np.timedelta64(days, "D")))
+            out[name] = np.where(start_px != 0, (end_px - start_px) / start_px * 100.0, np.nan)
+    return out
+
+# ---------- Results Cache ----------
+def _markets_hash(path: str) -> str:
+    """hash لمحتوى ملف الأسواق، فأي تعديل في الملف بيبطّل الكاش"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return "fallback"
+
+def _cache_key(kind, start_date, end_date, today, markets_path, fetcher) -> tuple:
+    day = lambda d: pd.Timestamp(d).normalize()
+    return (kind, day(start_date), day(end_date), day(today), _markets_hash(markets_path), fetcher)
+
+def _cached(key, build, ttl=RESULTS_TTL):
+    now = time.monotonic()
+    with _RESULTS_LOCK:
+        hit = _RESULTS_CACHE.get(key)
+        if hit is not None and now - hit[0] < ttl:
+            _RESULTS_CACHE.move_to_end(key)
+            return hit[1], True
+    value = build()
+    with _RESULTS_LOCK:
+        _RESULTS_CACHE[key] = (now, value)
+        _RESULTS_CACHE.move_to_end(key)
+        while len(_RESULTS_CACHE) > RESULTS_CACHE_SIZE:
+            _RESULTS_CACHE.popitem(last=False)
+    return value, False
+
+def clear_results_cache():
+    with _RESULTS_LOCK:
+        _RESULTS_CACHE.clear()
+
 # ---------- Public API ----------
-def build_results(start_date, end_date, today=None, markets_path: str = MARKETS_FILE) -> pd.DataFrame:
+def build_results(start_date, end_date, today=None, markets_path: str = MARKETS_FILE, fetcher=None) -> pd.DataFrame:
+    """
+    جدول التغييرات لكل سوق. النتيجة متخزنة RESULTS_TTL ثانية بمفتاح
+    (start, end, today, hash ملف الأسواق)، وبيرجع نسخة فتعديلها مش بيأثر على الكاش.
+    """
     if today is None:
         today = end_date
+    key = _cache_key("results", start_date, end_date, today, markets_path, fetcher)
+    with telemetry.span("build_results") as sp:
+        df, hit = _cached(key, lambda: _build_results(start_date, end_date, today, markets_path, fetcher))
+        sp.rows, sp.cache = len(df), "hit" if hit else "miss"
+    return df.copy()
 
+def _build_results(start_date, end_date, today, markets_path, fetcher) -> pd.DataFrame:
     markets = load_markets(markets_path)
     dl_start = pd.to_datetime(start_date) - timedelta(days=400)
     dl_end   = pd.to_datetime(end_date) + timedelta(days=1)
 
-    rows = []
-    for _, m in markets.iterrows():
-        country, ticker, name, iso3 = m["Country"], m["YahooTicker"], m.get("MainIndexName", ""), m.get("ISO3")
-        s = _download_close(ticker, dl_start, dl_end)
-        status = "✅ OK" if not s.empty else "❌ Not Found"
-        if s.empty:
-            row = dict(Country=country, ISO3=iso3, MainIndexName=name, YahooTicker=ticker,
-                       status=status, daily=None, weekly=None, monthly=None, yearly=None)
-        else:
-            d   = _pct_change_daily(s, today)
-            w   = _pct_change_over(s, 7,   today)
-            mon = _pct_change_over(s, 30,  today)
-            yr  = _pct_change_over(s, 365, today)
-            row = dict(Country=country, ISO3=iso3, MainIndexName=name, YahooTicker=ticker,
-                       status=status, daily=d, weekly=w, monthly=mon, yearly=yr)
-        rows.append(row)
-
-    df = pd.DataFrame(rows)
-    for col in ["daily", "weekly", "monthly", "yearly"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+    with telemetry.span("build_results.download") as sp:
+        closes = download_closes(markets["YahooTicker"].tolist(), dl_start, dl_end, fetcher=fetcher)
+        sp.rows = sum(len(s) for s in closes.values())
+    with telemetry.span("build_results.returns") as sp:
+        panel = build_close_panel(closes)
+        changes = asof_returns(panel, [today])
+        sp.rows = panel.size
+
+    df = markets[["Country", "ISO3", "MainIndexName", "YahooTicker"]].reset_index(drop=True)
+    df["status"] = ["✅ OK" if not closes[t].empty else "❌ Not Found" for t in df["YahooTicker"]]
+    col_pos = panel.columns.get_indexer(df["YahooTicker"])
+    for col in RETURN_COLUMNS:
+        df[col] = changes[col][0, col_pos] if len(col_pos) else np.array([], dtype="float64")
     return df
 
 # ---------- Color Classification ----------
@@ -155,25 +313,54 @@ def classify_color_class(row: pd.Series) -> str:
         return "GREEN"
 
 def attach_color_classes(df: pd.DataFrame) -> pd.DataFrame:
-    return df.assign(ColorClass=df.apply(classify_color_class, axis=1))
+    # نفس قواعد classify_color_class بس على الأعمدة كلها مرة واحدة
+    def neg(col):
+        if col not in df:
+            return np.zeros(len(df), dtype=bool)
+        return (pd.to_numeric(df[col], errors="coerce") < 0).to_numpy()
+
+    y, m, w, d = neg("yearly"), neg("monthly"), neg("weekly"), neg("daily")
+    color = np.select(
+        [y & m & w & d, m & w & d, w & d, d],
+        ["RED", "ORANGE", "YELLOW", "LIGHT_GREEN"],
+        default="GREEN",
+    )
+    return df.assign(ColorClass=color)
 
 # ---------- Plot World Map ----------
-def plot_world_map(start_date, end_date, today):
-    # جهّز البيانات
-    df = build_results(start_date, end_date, today)
-    df = attach_color_classes(df)
-
-    # خريطة من الألوان إلى labels أوضح
-    label_map = {
-        "GREEN": "No Problem",
-        "LIGHT_GREEN": "OK",
-        "YELLOW": "Not Stable",
-        "ORANGE": "Unstable",
-        "RED": "Critical"
-    }
+# خريطة من الألوان إلى labels أوضح
+COLOR_LABELS = {
+    "GREEN": "No Problem",
+    "LIGHT_GREEN": "OK",
+    "YELLOW": "Not Stable",
+    "ORANGE": "Unstable",
+    "RED": "Critical"
+}
+LABEL_COLORS = {
+    "No Problem": "green",
+    "OK": "lightgreen",
+    "Not Stable": "yellow",
+    "Unstable": "orange",
+    "Critical": "red"
+}
+
+def plot_world_map(start_date, end_date, today, markets_path: str = MARKETS_FILE, fetcher=None):
+    # نفس المدخلات = نفس الخريطة، فمش لازم نبنيها تاني مع كل تفاعل في الواجهة
+    key = _cache_key("map", start_date, end_date, today, markets_path, fetcher)
+    with telemetry.span("plot_world_map") as sp:
+        fig, hit = _cached(key, lambda: _plot_world_map(start_date, end_date, today, markets_path, fetcher))
+        sp.cache = "hit" if hit else "miss"
+    return fig
+
+def _plot_world_map(start_date, end_date, today, markets_path, fetcher):
+    import plotly.express as px
+    from market_snapshots import results_asof
+
+    # جهّز البيانات (من جدول الـ snapshots لو today متخزن، غير كده build_results)
+    df = results_asof(start_date, end_date, today, markets_path=markets_path, fetcher=fetcher)
 
     # إنشاء عمود للـ legend
-    df["ColorLabel"] = df["ColorClass"].map(label_map)
+    df["ColorLabel"] = df["ColorClass"].map(COLOR_LABELS)
 
     # الخريطة
     fig = px.choropleth(
@@ -183,13 +370,7 @@ def plot_world_map(start_date, end_date, today):
         hover_name="Country",          # اسم الدولة
         hover_data=["ColorLabel"],     # يظهر التصنيف عند الوقوف
         title=f"🌍 Global Markets Performance ({start_date} → {end_date})",
-        color_discrete_map={
-            "No Problem": "green",
-            "OK": "lightgreen",
-            "Not Stable": "yellow",
-            "Unstable": "orange",
-            "Critical": "red"
-        }
+        color_discrete_map=LABEL_COLORS
     )
 
     fig.update_layout(
@@ -198,3 +379,34 @@ def plot_world_map(start_date, end_date, today):
     )
 
     return fig
+
+def plot_world_map_animation(start_date, end_date, markets_path: str = MARKETS_FILE, max_frames: int = 60):
+    """الخريطة على مدار [start, end] كـ animation، كل فريم قراءة من جدول الـ snapshots"""
+    import plotly.express as px
+    from market_snapshots import animation_frames, ensure_snapshots, query_snapshots
+
+    key = _cache_key("map_animation", start_date, end_date, end_date, markets_path, max_frames)
+    def build():
+        ensure_snapshots(start_date, end_date, markets_path)
+        df = query_snapshots(start_date, end_date, markets_path)
+        df = df[df["Date"].isin(animation_frames(start_date, end_date, max_frames))].copy()
+        df["Frame"] = df["Date"].dt.strftime("%Y-%m-%d")
+        df["ColorLabel"] = df["ColorClass"].map(COLOR_LABELS)
+        fig = px.choropleth(
+            df,
+            locations="ISO3",
+            color="ColorLabel",
+            hover_name="Country",
+            hover_data=["ColorLabel", *RETURN_COLUMNS],
+            animation_frame="Frame",
+            category_orders={"ColorLabel": list(LABEL_COLORS)},
+            title=f"🌍 Global Markets Performance over time ({start_date} → {end_date})",
+            color_discrete_map=LABEL_COLORS
+        )
+        fig.update_layout(legend_title="Status", margin={"r":0,"t":30,"l":0,"b":0})
+        return fig
+
+    with telemetry.span("plot_world_map_animation") as sp:
+        fig, hit = _cached(key, build)
+        sp.cache = "hit" if hit else "miss"
+    return fig
@@ -0,0 +1,67 @@
+# keyword_matcher.py
+import pandas as pd
+
+class KeywordMatcher:
+    """
+    جدول مُجهّز مرة واحدة لكل الكلمات المفتاحية (الفلترة + مستويات الخطورة):
+    كل كلمة ليها bitmask، bit 0 للفلترة وbit لكل مستوى خطورة.
+    كل عنوان بيتعمل له lower مرة واحدة، والنتيجة هي نفس `k in title.lower()` بالظبط.
+    """
+
+    def __init__(self, keywords, risk_keywords: dict, default_risk: str = "Low"):
+        self.tiers = list(risk_keywords)
+        self.default_risk = default_risk
+
+        masks = {}
+        for k in keywords:
+            masks[k.lower()] = masks.get(k.lower(), 0) | 1
+        for i, tier in enumerate(self.tiers):
+            for k in risk_keywords[tier]:
+                masks[k.lower()] = masks.get(k.lower(), 0) | (2 << i)
+
+        # كلمة فاضية موجودة في أي نص
+        self._always = masks.pop("", 0)
+        self._items = list(masks.items())
+        self._risk_cache = {}
+
+    def _risk(self, mask: int) -> str:
+        risk = self._risk_cache.get(mask)
+        if risk is None:
+            risk = next((t for i, t in enumerate(self.tiers) if mask & (2 << i)), self.default_risk)
+            self._risk_cache[mask] = risk
+        return risk
+
+    def _mask(self, text: str) -> int:
+        mask = self._always
+        for k, m in self._items:
+            if k in text:
+                mask |= m
+        return mask
+
+    # ---------- Public API ----------
+    def scan(self, title: str) -> tuple[bool, str]:
+        """(هل العنوان فيه أي كلمة من كلمات الفلترة؟, مستوى الخطورة)"""
+        mask = self._mask(title.lower())
+        return bool(mask & 1), self._risk(mask)
+
+    def risk(self, title: str) -> str:
+        return self._risk(self._mask(title.lower()))
+
+    def scan_many(self, titles) -> pd.DataFrame:
+        """
+        نفس scan على قائمة/Series من العناوين (نفس loop الـ _mask بمتغيرات محلية).
+        `k in title` بحث C سريع، وأسرع هنا من regex واحد بكل الكلمات
+        (re بتاع Python بيجرب البدائل عند كل حرف).
+        """
+        index = titles.index if isinstance(titles, pd.Series) else None
+        items, always = self._items, self._always
+        masks = []
+        for t in titles:
+            t = str(t).lower()
+            mask = always
+            for k, m in items:
+                if k in t:
+                    mask |= m
+            masks.append(mask)
+        risk = list(map(self._risk, masks))
+        return pd.DataFrame({"match": [m & 1 == 1 for m in masks], "Risk": risk}, index=index)
@@ -0,0 +1,224 @@
+# market_snapshots.py
+# جدول محسوب مسبقًا: لكل يوم (تقويمي) ولكل سوق التغيير اليومي/الأسبوعي/الشهري/السنوي + ColorClass.
+# تغيير تاريخ "Today" أو تحريك الخريطة على الزمن بقى قراءة من الجدول بدل build_results كامل.
+# الجدول بيتبني مرة واحدة وبيتمد للأيام الجديدة بس، ومتقسم بـ hash ملف الأسواق.
+# الصفوف اللي تحميلها فشل وآخر RECENT_DAYS يوم بيتعاد حسابهم كل SNAPSHOT_RECHECK ثانية
+# (فشل مؤقت في المزود أو إغلاق اتنشر متأخر مش بيتخزن للأبد).
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import telemetry
+from index_analysis import (
+    MARKETS_FILE, RETURN_COLUMNS, _markets_hash, asof_returns, attach_color_classes,
+    build_close_panel, build_results, download_closes, load_markets,
+)
+
+# ---------- Config ----------
+SNAPSHOT_DB = os.environ.get("GTI_SNAPSHOT_STORE", "snapshots.sqlite")
+HISTORY_PAD = timedelta(days=400)   # نفس هامش build_results قبل أول يوم (للتغيير السنوي)
+RECENT_DAYS = 3                      # أيام قبل النهارده ممكن إغلاقها لسه يتعدّل/يتنشر
+SNAPSHOT_RECHECK = 900               # ثواني بين كل إعادة حساب للصفوف الناقصة والأيام الأخيرة
+
+_LOCK = threading.Lock()
+_RECHECKED = {}   # (db path, markets_hash) -> monotonic آخر إعادة حساب
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    markets_hash TEXT NOT NULL,
+    date         TEXT NOT NULL,
+    ticker       TEXT NOT NULL,
+    daily        REAL,
+    weekly       REAL,
+    monthly      REAL,
+    yearly       REAL,
+    color        TEXT NOT NULL,
+    ok           INTEGER NOT NULL,
+    PRIMARY KEY (markets_hash, date, ticker)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshot_coverage (
+    markets_hash TEXT PRIMARY KEY,
+    start        TEXT NOT NULL,
+    end          TEXT NOT NULL
+);
+"""
+
+# ---------- Helpers ----------
+def _connect(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=30)
+    con.executescript(_SCHEMA)
+    return con
+
+def _day(d) -> date:
+    return pd.Timestamp(d).date()
+
+def _coverage(con, key: str):
+    row = con.execute("SELECT start, end FROM snapshot_coverage WHERE markets_hash = ?", (key,)).fetchone()
+    return (date.fromisoformat(row[0]), date.fromisoformat(row[1])) if row else None
+
+def _compute(markets: pd.DataFrame, first: date, last: date, fetcher=None) -> pd.DataFrame:
+    """كل الأيام من first لـ last × كل الأسواق في نداء asof_returns واحد"""
+    tickers = markets["YahooTicker"].tolist()
+    closes = download_closes(tickers, pd.Timestamp(first) - HISTORY_PAD, pd.Timestamp(last) + timedelta(days=1), fetcher=fetcher)
+    panel = build_close_panel(closes)
+    days = pd.date_range(first, last, freq="D")
+    changes = asof_returns(panel, days)
+
+    # ok زي status بتاع build_results: التحميل رجّع أسعار للتيكر (مش لازم لحد اليوم ده)
+    col_pos = panel.columns.get_indexer(tickers)
+    long = pd.DataFrame({
+        "date": np.repeat(days.strftime("%Y-%m-%d").to_numpy(), len(tickers)),
+        "ticker": np.tile(tickers, len(days)),
+        **{col: changes[col][:, col_pos].ravel() for col in RETURN_COLUMNS},
+        "ok": np.tile([int(not closes[t].empty) for t in tickers], len(days)),
+    })
+    return attach_color_classes(long)
+
+def _store(path: str, key: str, df: pd.DataFrame, first: date | None = None, last: date | None = None):
+    """بيكتب الصفوف، ولو first/last موجودين بيمد التغطية (مدى متصل) عليهم"""
+    rows = df[["date", "ticker", *RETURN_COLUMNS, "ColorClass", "ok"]].astype(object).where(df.notna(), None)
+    with _LOCK:
+        con = _connect(path)
+        try:
+            con.executemany(
+                "INSERT OR REPLACE INTO snapshots (markets_hash, date, ticker, daily, weekly, monthly, yearly, color, ok) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(key, *r) for r in rows.itertuples(index=False, name=None)],
+            )
+            if first is not None:
+                cov = _coverage(con, key)
+                new_start = first if cov is None else min(cov[0], first)
+                new_end = last if cov is None else max(cov[1], last)
+                con.execute(
+                    "INSERT OR REPLACE INTO snapshot_coverage (markets_hash, start, end) VALUES (?, ?, ?)",
+                    (key, new_start.isoformat(), new_end.isoformat()),
+                )
+            con.commit()
+        finally:
+            con.close()
+
+def _recheck(path: str, key: str, markets: pd.DataFrame, start: date, end: date, fetcher=None) -> int:
+    """
+    بيعيد حساب (1) آخر RECENT_DAYS يوم متخزنين لكل الأسواق و (2) التيكرات اللي تحميلها
+    فشل (ok=0) على الأيام بتاعتها. مرة كل SNAPSHOT_RECHECK ثانية بالكتير لكل جدول.
+    """
+    now = time.monotonic()
+    with _LOCK:
+        if now - _RECHECKED.get((path, key), -SNAPSHOT_RECHECK) < SNAPSHOT_RECHECK:
+            return 0
+        _RECHECKED[(path, key)] = now
+        con = _connect(path)
+        try:
+            failed = con.execute(
+                "SELECT ticker, MIN(date), MAX(date) FROM snapshots "
+                "WHERE markets_hash = ? AND ok = 0 AND date BETWEEN ? AND ? GROUP BY ticker",
+                (key, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        finally:
+            con.close()
+
+    recent = max(start, date.today() - timedelta(days=RECENT_DAYS))
+    jobs = [(markets, recent, end)] if recent <= end else []
+    for ticker, first, last in failed:
+        first, last = date.fromisoformat(first), min(date.fromisoformat(last), recent - timedelta(days=1))
+        if first <= last:
+            jobs.append((markets[markets["YahooTicker"] == ticker], first, last))
+
+    for subset, first, last in jobs:
+        with telemetry.span("snapshots.recheck") as sp:
+            df = _compute(subset, first, last, fetcher)
+            sp.rows = len(df)
+        _store(path, key, df)
+    return len(jobs)
+
+# ---------- Public API ----------
+def ensure_snapshots(start, end, markets_path: str = MARKETS_FILE, fetcher=None, path: str = SNAPSHOT_DB) -> int:
+    """
+    يتأكد إن الجدول مغطي [start, end]. الأيام اللي ناقصة بس (قبل أول يوم أو بعد آخر يوم
+    متخزن) بتتحسب، فالتغطية دايمًا مدى واحد متصل. النهارده وما بعده مش بيتخزن
+    (إغلاق اليوم لسه بيتغير). الأيام الأخيرة والصفوف اللي تحميلها فشل بيتعاد حسابهم
+    (_recheck). بيرجع عدد الأيام اللي اتضافت.
+    """
+    key = _markets_hash(markets_path)
+    start, end = _day(start), min(_day(end), date.today() - timedelta(days=1))
+    if start > end:
+        return 0
+    with _LOCK:
+        con = _connect(path)
+        try:
+            cov = _coverage(con, key)
+        finally:
+            con.close()
+
+    if cov is None:
+        missing = [(start, end)]
+    else:
+        c_start, c_end = cov
+        missing = []
+        if start < c_start:
+            missing.append((start, c_start - timedelta(days=1)))
+        if end > c_end:
+            missing.append((c_end + timedelta(days=1), end))
+
+    markets = load_markets(markets_path)
+    added = 0
+    for first, last in missing:
+        with telemetry.span("snapshots.build") as sp:
+            df = _compute(markets, first, last, fetcher)
+            sp.rows = len(df)
+        _store(path, key, df, first, last)
+        added += (last - first).days + 1
+    if added:
+        with _LOCK:
+            _RECHECKED[(path, key)] = time.monotonic()   # لسه محسوبين دلوقتي
+    _recheck(path, key, markets, start, end, fetcher)
+    return added
+
+def query_snapshots(start, end, markets_path: str = MARKETS_FILE, path: str = SNAPSHOT_DB) -> pd.DataFrame:
+    """
+    صفوف الجدول من start لـ end (شامل) بنفس أعمدة attach_color_classes(build_results(...))
+    + عمود Date. الأيام اللي مش متخزنة مش بتظهر. status زي build_results: التحميل
+    (على مدى البناء) رجّع أسعار للتيكر، حتى لو مفيش سعر لحد اليوم ده.
+    """
+    markets = load_markets(markets_path)
+    with _LOCK:
+        con = _connect(path)
+        try:
+            df = pd.read_sql_query(
+                "SELECT date, ticker, daily, weekly, monthly, yearly, color, ok FROM snapshots "
+                "WHERE markets_hash = ? AND date BETWEEN ? AND ? ORDER BY date",
+                con, params=(_markets_hash(markets_path), _day(start).isoformat(), _day(end).isoformat()),
+            )
+        finally:
+            con.close()
+    info = markets[["Country", "ISO3", "MainIndexName", "YahooTicker"]]
+    df = info.merge(df.rename(columns={"ticker": "YahooTicker", "color": "ColorClass"}), on="YahooTicker")
+    df["status"] = np.where(df.pop("ok") == 1, "✅ OK", "❌ Not Found")
+    df.insert(0, "Date", pd.to_datetime(df.pop("date")))
+    df = df.sort_values(["Date"], kind="stable").reset_index(drop=True)
+    return df[["Date", "Country", "ISO3", "MainIndexName", "YahooTicker", "status", *RETURN_COLUMNS, "ColorClass"]]
+
+def results_asof(start_date, end_date, today, markets_path: str = MARKETS_FILE, fetcher=None, path: str = SNAPSHOT_DB) -> pd.DataFrame:
+    """
+    نفس attach_color_classes(build_results(start, end, today)) بس من الجدول لو ينفع:
+    today جوه [start, end] وقبل النهارده. غير كده (today > end، أو النهارده، أو fetcher مخصص)
+    بنرجع للحساب الكامل.
+    """
+    day = _day(today)
+    if fetcher is None and _day(start_date) <= day <= _day(end_date) and day < date.today():
+        ensure_snapshots(start_date, end_date, markets_path, path=path)
+        with telemetry.span("snapshots.lookup") as sp:
+            df = query_snapshots(day, day, markets_path, path).drop(columns="Date")
+            sp.rows = len(df)
+        if len(df):
+            return df
+    return attach_color_classes(build_results(start_date, end_date, today, markets_path=markets_path, fetcher=fetcher))
+
+def animation_frames(start, end, max_frames: int = 60) -> pd.DatetimeIndex:
+    """تواريخ متساوية المسافة (آخر يوم دايمًا موجود) بحيث عدد الفريمات ميعدّيش max_frames"""
+    days = pd.date_range(_day(start), _day(end), freq="D")
+    step = max(1, int(np.ceil(len(days) / max_frames)))
+    return days[::-1][::step][::-1]
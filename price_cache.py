@@ -0,0 +1,191 @@
+# price_cache.py
+# كاش أسعار مشترك للعملية كلها (كل الـ sessions) فوق price_store:
+# - جدول واحد في الذاكرة للـ universe (أوزان + أسواق) على آخر CACHE_HISTORY_DAYS يوم، وكل طلب مجرد slice منه
+# - لو كذا session طلبوا نفس التيكر في نفس الوقت، طلب تحميل واحد بس والباقي بيستنوه (single-flight)
+# - thread في الخلفية بيحدّث الـ universe بعد إغلاق كل بورصة بشوية، فأول زائر بعد الإغلاق ميستناش Yahoo
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import pandas as pd
+import price_store
+import telemetry
+
+CACHE_HISTORY_DAYS = 3 * 365   # أقدم من كده بيروح لـ price_store مباشرة
+MAX_AGE = 26 * 3600            # ثواني؛ لو الـ refresher وقف، التيكر بيتحمّل تاني عند الطلب
+FAILED_TTL = 300               # ثواني؛ التيكر اللي فشل تحميله مش بيتطلب تاني قبلها (بيرجع NaN)
+REFRESH_DELAY = timedelta(minutes=20)  # Yahoo بيتأخر شوية في نشر سعر الإغلاق
+
+# مواعيد الإغلاق المحلية للبورصات اللي في الـ universe
+EXCHANGE_CLOSES = {
+    "America/New_York": "16:00",
+    "Europe/London": "16:30",
+    "Europe/Paris": "17:30",
+    "Asia/Tokyo": "15:00",
+    "Asia/Shanghai": "15:00",
+    "Asia/Hong_Kong": "16:00",
+    "Asia/Kolkata": "15:30",
+    "Asia/Riyadh": "15:00",
+    "Africa/Cairo": "14:30",
+}
+
+def next_refresh(now: datetime | None = None, closes: dict = EXCHANGE_CLOSES, delay: timedelta = REFRESH_DELAY) -> datetime:
+    """أقرب وقت (UTC) بعد now = إغلاق بورصة + delay"""
+    now = now or datetime.now(timezone.utc)
+    best = None
+    for tz, hhmm in closes.items():
+        zone = ZoneInfo(tz)
+        hour, minute = (int(x) for x in hhmm.split(":"))
+        local = now.astimezone(zone)
+        for days in (0, 1):
+            day = local.date() + timedelta(days=days)
+            at = datetime(day.year, day.month, day.day, hour, minute, tzinfo=zone) + delay
+            if at > now:
+                best = at if best is None or at < best else best
+                break
+    return best.astimezone(timezone.utc)
+
+def default_universe(weights_path: str = "stocks_weights.csv", markets_path: str | None = None) -> list:
+    """رموز ملف الأوزان + تيكرات الأسواق (بتتقري من الملفات كل مرة فأي تعديل بيظهر)"""
+    from gti_engine import load_weights
+    import index_analysis
+    tickers = []
+    try:
+        tickers += load_weights(weights_path)["symbol"].tolist()
+    except ValueError:
+        pass
+    tickers += index_analysis.load_markets(markets_path or index_analysis.MARKETS_FILE)["YahooTicker"].tolist()
+    return list(dict.fromkeys(tickers))
+
+class SharedPriceCache:
+    """
+    جدول إغلاق (Date × Ticker) واحد في الذاكرة من self.start لحد النهارده.
+    get(symbols, start, end) بنفس شكل price_store.load_close (end مش داخل).
+    """
+
+    def __init__(self, history_days: int = CACHE_HISTORY_DAYS, fetcher=None, store_path=None):
+        self.start = pd.Timestamp.today().normalize() - pd.Timedelta(days=history_days)
+        self.fetcher = fetcher
+        self.store_path = store_path
+        self._frame = pd.DataFrame()
+        self._loaded_at = {}   # ticker -> monotonic
+        self._failed_until = {}  # ticker -> monotonic (negative cache)
+        self._inflight = {}    # ticker -> Future
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_refresh = None
+        self.next_refresh = None
+
+    def _window_end(self) -> pd.Timestamp:
+        return pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+
+    def _load(self, tickers, force: bool = False) -> int:
+        """
+        يتأكد إن التيكرات في الذاكرة. التيكرات اللي بيتحمّلها thread تاني دلوقتي
+        بنستناها بدل ما نطلبها تاني. بيرجع عدد التيكرات اللي الـ thread ده حمّلها.
+        """
+        now = time.monotonic()
+        mine, waits = [], []
+        with self._lock:
+            for t in dict.fromkeys(tickers):
+                if not force and t in self._loaded_at and now - self._loaded_at[t] < MAX_AGE:
+                    continue
+                if not force and now < self._failed_until.get(t, 0.0):
+                    continue
+                fut = self._inflight.get(t)
+                if fut is None:
+                    fut = self._inflight[t] = Future()
+                    mine.append(t)
+                waits.append(fut)
+
+        if mine:
+            try:
+                df = price_store.load_close(mine, self.start, self._window_end(), fetcher=self.fetcher, path=self.store_path)
+                # price_store بيتخطى التيكرات اللي فشلت من غير exception: دول منعلّمهمش كمحمّلين
+                # ومنمسحش نسختهم القديمة لو موجودة، بس منطلبهمش تاني قبل FAILED_TTL
+                got = [t for t in mine if t in df.columns and df[t].notna().any()]
+                with self._lock:
+                    frame = self._frame.drop(columns=got, errors="ignore")
+                    self._frame = pd.concat([frame, df[got]], axis=1).sort_index()
+                    loaded = time.monotonic()
+                    for t in got:
+                        self._loaded_at[t] = loaded
+                        self._failed_until.pop(t, None)
+                    for t in set(mine) - set(got):
+                        self._failed_until[t] = loaded + FAILED_TTL
+                error = None
+            except Exception as e:
+                error = e
+            with self._lock:
+                for t in mine:
+                    fut = self._inflight.pop(t)
+                    fut.set_exception(error) if error else fut.set_result(None)
+
+        for fut in waits:
+            fut.result()
+        return len(mine)
+
+    def get(self, symbols, start, end) -> pd.DataFrame:
+        symbols = list(dict.fromkeys(symbols))
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if start < self.start:
+            return price_store.load_close(symbols, start, end, fetcher=self.fetcher, path=self.store_path)
+        with telemetry.span("price_cache.get") as sp:
+            fetched = self._load(symbols)
+            frame = self._frame
+            idx = frame.index
+            out = frame.loc[(idx >= start) & (idx < end)].reindex(columns=symbols)
+            sp.rows, sp.cache = out.size, "miss" if fetched else "hit"
+        return out
+
+    # ---------- Background Refresh ----------
+    def refresh(self, tickers):
+        with telemetry.span("price_cache.refresh", rows=len(tickers)):
+            self._load(tickers, force=True)
+        self.last_refresh = datetime.now(timezone.utc)
+
+    def start_refresher(self, universe, closes: dict = EXCHANGE_CLOSES):
+        """
+        universe(): قائمة التيكرات (بتتنادى كل مرة). أول تحميل فورًا عشان الكاش يسخن،
+        وبعدين تحديث بعد كل إغلاق بورصة في closes.
+        """
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.refresh(universe())
+                except Exception as e:
+                    telemetry.log_event("price_cache refresh failed", error=str(e))
+                self.next_refresh = next_refresh(closes=closes)
+                wait = (self.next_refresh - datetime.now(timezone.utc)).total_seconds()
+                self._stop.wait(max(wait, 1.0))
+
+        self._thread = threading.Thread(target=loop, name="price-cache-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+# ---------- Process-wide Instance ----------
+_SHARED = None
+_SHARED_LOCK = threading.Lock()
+
+def start_shared(universe=default_universe, **kwargs) -> SharedPriceCache:
+    """الكاش المشترك للعملية (بيتعمل مرة واحدة) مع الـ refresher"""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = SharedPriceCache(**kwargs)
+            if universe is not None:
+                _SHARED.start_refresher(universe)
+        return _SHARED
+
+def load_close(tickers, start, end, fetcher=None) -> pd.DataFrame:
+    """زي price_store.load_close، بس من الكاش المشترك لو شغال"""
+    if fetcher is None and _SHARED is not None:
+        return _SHARED.get(tickers, start, end)
+    return price_store.load_close(tickers, start, end, fetcher=fetcher)
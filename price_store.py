@@ -0,0 +1,181 @@
+# price_store.py
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+import pandas as pd
+import telemetry
+
+# ---------- Config ----------
+STORE_FILE = os.environ.get("GTI_PRICE_STORE", "price_store.sqlite")
+
+# آخر شمعة (اليوم) ممكن تكون لسه بتتغير، فبنعيد تحميلها بعد المدة دي بس
+TAIL_TTL = timedelta(minutes=15)
+
+# لو المدى الناقص أقصر من كده ومرجعش بيانات، غالبًا إجازة/ويك إند مش فشل
+EMPTY_GAP_DAYS = 5
+
+_LOCK = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    ticker TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    close  REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    ticker     TEXT PRIMARY KEY,
+    start      TEXT NOT NULL,
+    end        TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+# ---------- Provider ----------
+def yahoo_fetch(tickers, start, end) -> pd.DataFrame:
+    """
+    تحميل أسعار الإغلاق من Yahoo Finance كجدول عريض (Date × Ticker)
+    """
+    import yfinance as yf
+    tickers = list(tickers)
+    raw = yf.download(tickers, start=start, end=end, auto_adjust=True, progress=False)
+    if raw is None or raw.empty or "Close" not in raw:
+        return pd.DataFrame()
+    close = raw["Close"]
+    if isinstance(close, pd.Series):
+        close = close.to_frame(name=tickers[0])
+    return close
+
+# ---------- Helpers ----------
+def _connect(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=30)
+    con.executescript(_SCHEMA)
+    return con
+
+def _read_coverage(con) -> dict:
+    coverage = {}
+    for t, c_start, c_end, fetched_at in con.execute("SELECT ticker, start, end, fetched_at FROM coverage"):
+        coverage[t] = (date.fromisoformat(c_start), date.fromisoformat(c_end), datetime.fromisoformat(fetched_at))
+    return coverage
+
+def _day(x) -> date:
+    return pd.Timestamp(x).date()
+
+def _missing_ranges(cov, start: date, end: date, today: date, now: datetime):
+    """المدى/المديات اللي لسه ناقصة من [start, end) للتيكر ده"""
+    if cov is None:
+        return [(start, end)]
+    c_start, c_end, fetched_at = cov
+    gaps = []
+    if start < c_start:
+        gaps.append((start, c_start))
+    if end > c_end:
+        fresh = c_end >= today and now - fetched_at < TAIL_TTL
+        if not fresh:
+            gaps.append((c_end, end))
+    return gaps
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df.copy()
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index = df.index.normalize()
+    return df[~df.index.duplicated(keep="last")]
+
+def _write(con, frame: pd.DataFrame, tickers, start: date, end: date, today: date, now: datetime, coverage):
+    rows = []
+    covered = []
+    for t in tickers:
+        s = frame[t].dropna() if t in frame.columns else pd.Series(dtype="float64")
+        if s.empty and (end - start).days > EMPTY_GAP_DAYS:
+            # التيكر فشل، منسجلش إننا غطّينا المدى ده عشان نحاول تاني
+            continue
+        rows.extend((t, d.strftime("%Y-%m-%d"), float(v)) for d, v in s.items())
+        covered.append(t)
+
+    con.executemany("INSERT OR REPLACE INTO prices (ticker, date, close) VALUES (?, ?, ?)", rows)
+    for t in covered:
+        new_start, new_end = start, min(end, today)
+        if t in coverage:
+            c_start, c_end, _ = coverage[t]
+            if start > c_end or end < c_start:
+                # thread تاني غطّى مدى منفصل عن ده: التغطية مدى واحد متصل، فمنمدّهاش
+                # فوق فجوة مفيهاش بيانات. الصفوف اتخزنت، والطلب الجاي هيحمّل الفجوة.
+                continue
+            new_start, new_end = min(new_start, c_start), max(new_end, c_end)
+        coverage[t] = (new_start, new_end, now)
+        con.execute(
+            "INSERT OR REPLACE INTO coverage (ticker, start, end, fetched_at) VALUES (?, ?, ?, ?)",
+            (t, new_start.isoformat(), new_end.isoformat(), now.isoformat()),
+        )
+
+# ---------- Public API ----------
+def load_close(tickers, start, end, fetcher=None, path: str | None = None) -> pd.DataFrame:
+    """
+    أسعار الإغلاق للفترة [start, end) كجدول عريض (Date × Ticker).
+    بيقرا من المخزن المحلي وبيحمّل من المزود بس الأجزاء الناقصة (أول/آخر المدى).
+    """
+    fetcher = fetcher or yahoo_fetch
+    path = path or STORE_FILE
+    tickers = list(dict.fromkeys(tickers))
+    start, end = _day(start), _day(end)
+    today = date.today()
+    now = datetime.now()
+
+    with _LOCK:
+        con = _connect(path)
+        try:
+            coverage = _read_coverage(con)
+        finally:
+            con.close()
+
+    # نجمع التيكرات اللي ناقصها نفس المدى في طلب واحد
+    groups = {}
+    for t in tickers:
+        for gap in _missing_ranges(coverage.get(t), start, end, today, now):
+            groups.setdefault(gap, []).append(t)
+
+    # التحميل نفسه برا الـ lock عشان الطلبات المتوازية متستناش بعض
+    fetched = []
+    for (g_start, g_end), group in groups.items():
+        with telemetry.span("price_store.fetch", cache="miss") as sp:
+            try:
+                frame = _normalize_frame(fetcher(group, g_start, g_end))
+            except Exception:
+                continue
+            sp.rows = len(frame) * len(group)
+        fetched.append((frame, group, g_start, g_end))
+
+    with _LOCK, telemetry.span("price_store.read", cache="miss" if groups else "hit") as sp:
+        con = _connect(path)
+        try:
+            if fetched:
+                coverage = _read_coverage(con)
+                for frame, group, g_start, g_end in fetched:
+                    _write(con, frame, group, g_start, g_end, today, now, coverage)
+                con.commit()
+
+            placeholders = ",".join("?" * len(tickers))
+            long = pd.read_sql_query(
+                f"SELECT ticker, date, close FROM prices WHERE ticker IN ({placeholders}) AND date >= ? AND date < ?",
+                con, params=[*tickers, start.isoformat(), end.isoformat()],
+            )
+        finally:
+            con.close()
+        sp.rows = len(long)
+
+    if long.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="Date"), columns=tickers, dtype="float64")
+    wide = long.pivot(index="date", columns="ticker", values="close")
+    wide.index = pd.to_datetime(wide.index)
+    wide.index.name = "Date"
+    wide.columns.name = None
+    return wide.reindex(columns=tickers).sort_index()
+
+def load_series(ticker: str, start, end, fetcher=None, path: str | None = None) -> pd.Series:
+    df = load_close([ticker], start, end, fetcher=fetcher, path=path)
+    return df[ticker].dropna() if ticker in df.columns else pd.Series(dtype="float64")
@@ -0,0 +1,157 @@
+# telemetry.py
+# قياس زمن كل مرحلة (span) + عدد الصفوف + cache hit/miss.
+# مقفول افتراضيًا: span() بيرجع كائن فاضي ثابت فالتكلفة تقريبًا صفر.
+#   GTI_METRICS=1               تشغيل القياس
+#   GTI_METRICS_FILE=path.prom  ملف Prometheus (text format) بيتكتب بعد كل rerun
+# spans الـ rerun وحالة التشغيل لكل session لوحدها (contextvar، فكل thread سكريبت ليه run بتاعه)،
+# والمجاميع بس (Prometheus) على مستوى العملية.
+import contextvars
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+ENV_ENABLED = os.environ.get("GTI_METRICS", "") not in ("", "0")
+ENABLED = ENV_ENABLED
+METRICS_FILE = os.environ.get("GTI_METRICS_FILE", "metrics.prom")
+LOG_FILE = os.environ.get("GTI_LOG_FILE", "logs.jsonl")
+
+_LOCK = threading.Lock()
+_TOTALS = {}     # stage -> مجاميع من أول تشغيل العملية
+_RUN_ID = 0
+
+class _Run:
+    __slots__ = ("id", "enabled", "spans")
+
+    def __init__(self, run_id, enabled):
+        self.id, self.enabled, self.spans = run_id, enabled, []
+
+# الـ rerun الحالي للـ context ده (None في الـ threads اللي في الخلفية)
+_CURRENT = contextvars.ContextVar("telemetry_run", default=None)
+
+class _Span:
+    __slots__ = ("name", "rows", "cache", "_t0")
+
+    def __init__(self, name, rows=None, cache=None):
+        self.name, self.rows, self.cache = name, rows, cache
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(_CURRENT.get(), self.name, time.perf_counter() - self._t0, self.rows, self.cache)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL = _NullSpan()
+
+def _record(run, name, seconds, rows, cache):
+    with _LOCK:
+        if run is not None:
+            run.spans.append({"run": run.id, "stage": name, "seconds": seconds, "rows": rows, "cache": cache})
+        t = _TOTALS.setdefault(name, {"calls": 0, "seconds": 0.0, "rows": 0, "hit": 0, "miss": 0, "last": 0.0})
+        t["calls"] += 1
+        t["seconds"] += seconds
+        t["last"] = seconds
+        if rows:
+            t["rows"] += int(rows)
+        if cache in ("hit", "miss"):
+            t[cache] += 1
+
+# ---------- Public API ----------
+def enable(flag: bool = True):
+    """جوه run: للـ run ده بس (زي checkbox الـ session). برا أي run: للعملية كلها"""
+    global ENABLED
+    run = _CURRENT.get()
+    if run is not None:
+        run.enabled = flag
+    else:
+        ENABLED = flag
+
+def span(name: str, rows=None, cache=None):
+    """
+    with span("build_results") as s:
+        ...
+        s.rows = len(df); s.cache = "hit"
+    """
+    if ENABLED:
+        return _Span(name, rows, cache)
+    run = _CURRENT.get()
+    return _Span(name, rows, cache) if run is not None and run.enabled else _NULL
+
+def start_run(enabled: bool | None = None):
+    """بداية rerun جديد للـ context الحالي (spans الـ sessions التانية مش بتتأثر)"""
+    global _RUN_ID
+    with _LOCK:
+        _RUN_ID += 1
+        run_id = _RUN_ID
+    _CURRENT.set(_Run(run_id, ENABLED if enabled is None else enabled))
+
+def bind(fn):
+    """fn بـ context الـ run الحالي، للـ thread pools (الـ threads الجديدة مش بتورث الـ contextvars)"""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+def current_run() -> list:
+    run = _CURRENT.get()
+    if run is None:
+        return []
+    with _LOCK:
+        return list(run.spans)
+
+def to_prometheus() -> str:
+    metrics = [
+        ("gti_stage_calls_total", "counter", "Number of times the stage ran", "calls"),
+        ("gti_stage_seconds_total", "counter", "Wall time spent in the stage", "seconds"),
+        ("gti_stage_rows_total", "counter", "Rows processed by the stage", "rows"),
+        ("gti_stage_last_seconds", "gauge", "Wall time of the most recent run of the stage", "last"),
+    ]
+    with _LOCK:
+        totals = {k: dict(v) for k, v in _TOTALS.items()}
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{stage="{stage}"}} {t[key]}' for stage, t in sorted(totals.items())]
+    lines += ["# HELP gti_stage_cache_total Cache lookups per stage", "# TYPE gti_stage_cache_total counter"]
+    for stage, t in sorted(totals.items()):
+        for result in ("hit", "miss"):
+            if t[result]:
+                lines.append(f'gti_stage_cache_total{{stage="{stage}",result="{result}"}} {t[result]}')
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: str | None = None):
+    path = path or METRICS_FILE
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(to_prometheus())
+    os.replace(tmp, path)
+
+def log_event(message: str, **fields):
+    """سطر JSON في ملف الـ log (بدل ملف logs.txt النصي)"""
+    record = {"ts": datetime.now().isoformat(timespec="seconds"), "message": message, **fields}
+    with _LOCK:
+        with open(LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+def flush_run():
+    """نهاية الـ rerun: ملخص الـ spans في الـ log وتحديث ملف Prometheus"""
+    run = _CURRENT.get()
+    if not (ENABLED or (run is not None and run.enabled)):
+        return
+    spans = current_run()
+    if spans:
+        log_event("run", run=spans[0]["run"], spans=spans)
+    write_prometheus()
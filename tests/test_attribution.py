@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from attribution import AttributionEngine
+from benchmarks.synthetic import SyntheticProvider
+
+WINDOWS = (5, 20, 60)
+
+@pytest.fixture
+def data():
+    provider = SyntheticProvider(n_tickers=6, years=2)
+    prices = provider.prices()
+    prices.iloc[[40, 41, 300], 2] = np.nan         # فجوات بتبقى عائد صفر
+    return prices, provider.weights()
+
+def _returns(prices):
+    return prices.pct_change(fill_method=None).dropna(how="all").fillna(0.0)
+
+def test_streaming_updates_match_pandas_windows(data):
+    prices, weights = data
+    split = len(prices) - 150
+    engine = AttributionEngine.from_prices(prices.iloc[:split], weights, WINDOWS)
+    engine.rebase_every = 7                           # rebase كذا مرة في النص
+    for i in range(split, len(prices), 13):
+        engine.update(prices.iloc[i:i + 13])
+
+    rets = _returns(prices)[engine.symbols]
+    for w in WINDOWS:
+        tail = rets.iloc[-w:]
+        np.testing.assert_allclose(engine.covariance(w), tail.cov(), rtol=1e-9, atol=1e-15, err_msg=str(w))
+        np.testing.assert_allclose(engine.correlation(w), tail.corr(), rtol=1e-9, atol=1e-12, err_msg=str(w))
+        np.testing.assert_allclose(engine.contributions(w)["window_contribution"], engine.w * tail.sum().to_numpy())
+    assert engine.last_date == prices.index[-1]
+
+def test_from_prices_matches_full_history(data):
+    prices, weights = data
+    engine = AttributionEngine.from_prices(prices, weights, WINDOWS)
+    rets = _returns(prices)[engine.symbols]
+    np.testing.assert_allclose(engine.covariance(60), rets.iloc[-60:].cov(), rtol=1e-9, atol=1e-15)
+
+def test_risk_share_sums_to_one(data):
+    prices, weights = data
+    engine = AttributionEngine.from_prices(prices, weights, WINDOWS)
+    for w in WINDOWS:
+        table = engine.contributions(w)
+        assert table["risk_share"].sum() == pytest.approx(1.0)
+        np.testing.assert_allclose(table["contribution"], table["weight"] * table["return"])
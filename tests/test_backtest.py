@@ -0,0 +1,41 @@
+import os
+import numpy as np
+import pandas as pd
+from backtest import backtest, single_asset_candidates
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _scenarios() -> pd.DataFrame:
+    df = pd.read_csv(os.path.join(ROOT, "scenarios.csv"))
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df.set_index("Date")
+
+def _old_metrics(df: pd.DataFrame, col: str) -> list:
+    # الحساب الأصلي بتاع gti_test.py لسيناريو واحد
+    returns = df[col].pct_change().dropna()
+    cumulative = (1 + df[col].pct_change()).cumprod().iloc[-1]
+    volatility = returns.std()
+    sharpe_like = returns.mean() / volatility if volatility > 0 else 0
+    correlation = returns.corr(df["SPY"].pct_change())
+    return [cumulative, volatility, sharpe_like, correlation]
+
+def test_reproduces_gti_test_metrics():
+    df = _scenarios()
+    scenarios = [c for c in df.columns if c != "SPY"]
+    result = backtest(df, single_asset_candidates(scenarios), benchmark="SPY")
+    expected = np.array([_old_metrics(df, c) for c in scenarios])
+    np.testing.assert_allclose(result.loc[scenarios].to_numpy(), expected, rtol=1e-10)
+
+def test_parallel_matches_serial():
+    df = _scenarios()
+    rng = np.random.default_rng(0)
+    symbols = [c for c in df.columns if c != "SPY"]
+    candidates = pd.DataFrame({
+        "candidate": np.repeat(np.arange(60), len(symbols)),
+        "symbol": symbols * 60,
+        "weight": rng.integers(1, 10, 60 * len(symbols)).astype(float),
+        "positive": rng.integers(0, 2, 60 * len(symbols)),
+    })
+    serial = backtest(df, candidates, chunk_size=16, n_jobs=1)
+    parallel = backtest(df, candidates, chunk_size=16, n_jobs=2)
+    pd.testing.assert_frame_equal(serial, parallel)
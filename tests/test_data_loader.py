@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import SyntheticProvider
+from data_loader import PricePanel, build_panel, load_panel, save_panel
+
+START, END = "2024-01-01", "2024-12-31"
+
+def test_build_panel_round_trips_and_is_memmapped(tmp_path):
+    provider = SyntheticProvider(n_tickers=7, years=2)
+    panel = build_panel(provider.tickers, START, END, str(tmp_path), chunk_size=3, fetcher=provider.fetch)
+    assert len(provider.calls) == 3                              # 3 + 3 + 1
+    assert isinstance(panel.data, np.memmap)
+    assert not panel.data.flags.writeable
+
+    expected = provider.fetch(provider.tickers, START, END).astype("float32")
+    pd.testing.assert_frame_equal(panel.to_frame(), expected, check_names=False, check_freq=False, check_index_type=False)
+    np.testing.assert_array_equal(load_panel(str(tmp_path), mmap=False).data, panel.data)
+
+def test_chunks_with_different_calendars_are_aligned(tmp_path):
+    provider = SyntheticProvider(n_tickers=4, years=1)
+
+    def fetcher(tickers, start, end):
+        df = provider.fetch(tickers, start, end)
+        # الدفعة التانية ناقصها أيام: لازم تبقى NaN في مكانها مش إزاحة
+        return df.iloc[::2] if tickers[0] == provider.tickers[2] else df
+
+    panel = build_panel(provider.tickers, START, END, str(tmp_path), chunk_size=2, fetcher=fetcher)
+    full = provider.fetch(provider.tickers, START, END).astype("float32")
+    frame = panel.to_frame()
+    np.testing.assert_array_equal(frame.iloc[::2].to_numpy(), full.iloc[::2].to_numpy())
+    assert frame.iloc[1::2, 2:].isna().all().all()
+    np.testing.assert_array_equal(frame.iloc[1::2, :2].to_numpy(), full.iloc[1::2, :2].to_numpy())
+
+def test_slices_and_chunks_share_memory(tmp_path):
+    provider = SyntheticProvider(n_tickers=5, years=1)
+    save_panel(PricePanel.from_frame(provider.fetch(provider.tickers, START, END)), str(tmp_path))
+    panel = load_panel(str(tmp_path))
+    t = provider.tickers
+
+    view = panel.slice("2024-03-01", "2024-06-01", t[1:4])
+    assert np.shares_memory(view.data, panel.data)
+    assert view.tickers == t[1:4] and view.dates[0] >= np.datetime64("2024-03-01")
+    assert view.dates[-1] < np.datetime64("2024-06-01")
+    np.testing.assert_array_equal(view.values, panel.to_frame().loc["2024-03-01":"2024-05-31", t[1:4]].to_numpy())
+
+    copy = panel.slice(tickers=[t[0], t[3]])
+    assert not np.shares_memory(copy.data, panel.data)
+    assert copy.tickers == [t[0], t[3]]
+    assert np.shares_memory(panel.series(t[2]), panel.data)
+
+    chunks = list(panel.iter_chunks(2))
+    assert [names for names, _ in chunks] == [t[0:2], t[2:4], t[4:]]
+    assert [a.shape for _, a in chunks] == [(len(panel), 2), (len(panel), 2), (len(panel), 1)]
+    assert all(np.shares_memory(a, panel.data) for _, a in chunks)
+    np.testing.assert_array_equal(np.hstack([a for _, a in chunks]), panel.values)
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from downsample import downsample_frame, lttb_indices
+
+def test_lttb_keeps_endpoints_and_extremes():
+    for seed in range(20):
+        rng = np.random.default_rng(seed)
+        y = np.cumsum(rng.normal(size=5000))
+        idx = lttb_indices(np.arange(len(y)), y, 300)
+        assert len(idx) == 300
+        assert idx[0] == 0 and idx[-1] == len(y) - 1
+        assert (np.diff(idx) > 0).all()
+        assert y.argmax() in idx and y.argmin() in idx
+
+def test_extremes_sharing_a_bucket_are_both_kept():
+    y = np.r_[np.zeros(10), 5.0, -5.0, np.zeros(10)]
+    idx = lttb_indices(np.arange(len(y)), y, 4)
+    assert {10, 11} <= set(idx) and idx[0] == 0 and idx[-1] == len(y) - 1
+
+def test_downsample_frame_on_dates():
+    dates = pd.date_range("2000-01-01", periods=3000, freq="D")
+    df = pd.DataFrame({"Date": dates, "GTI": np.sin(np.arange(3000) / 50.0) * 50 + 50})
+    small = downsample_frame(df, "Date", "GTI", 200)
+    assert len(small) == 200
+    assert small["Date"].iloc[0] == dates[0] and small["Date"].iloc[-1] == dates[-1]
+    assert len(downsample_frame(df.head(100), "Date", "GTI", 200)) == 100
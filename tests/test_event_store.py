@@ -0,0 +1,41 @@
+from datetime import date
+import event_store
+
+RISK_ORDER = {"High": 1, "Medium": 2, "Low": 3}
+
+def _event(day, title, link=None, risk="Low", source="Feed"):
+    return {"Date": day, "Title": title, "Source": source, "Link": link, "Risk": risk}
+
+def test_duplicates_by_link_and_normalized_title_are_ignored(tmp_path):
+    path = str(tmp_path / "events.sqlite")
+    added = event_store.add_events([
+        _event("2024-05-01", "Border talks resume", "http://a/1"),
+        _event("2024-05-01", "Different title, same link", "http://a/1"),
+        _event("2024-05-02", "  BORDER   talks\tresume ", "http://b/9"),
+        _event("2024-05-02", "No link story"),
+        _event("2024-05-02", "No link story"),
+        _event("2024-05-03", "Another no link story", ""),
+    ], RISK_ORDER, path=path)
+    assert added == 3
+    assert event_store.add_events([_event("2024-05-04", "Border talks resume", "http://c/2")], RISK_ORDER, path=path) == 0
+    titles = event_store.query_events("2024-01-01", "2024-12-31", path=path)["Title"].tolist()
+    assert sorted(titles) == ["Another no link story", "Border talks resume", "No link story"]
+
+def test_query_is_inclusive_and_ordered_by_risk_then_date(tmp_path):
+    path = str(tmp_path / "events.sqlite")
+    event_store.add_events([
+        _event("2024-04-30", "before", risk="High"),
+        _event("2024-05-01", "first day low"),
+        _event("2024-05-01", "first day high", risk="High"),
+        _event("2024-05-03", "last day high", risk="High"),
+        _event("2024-05-02", "middle medium", risk="Medium"),
+        _event("2024-05-03", "last day low"),
+        _event("2024-05-04", "after"),
+    ], RISK_ORDER, path=path)
+    df = event_store.query_events(date(2024, 5, 1), date(2024, 5, 3), path=path)
+    assert df["Title"].tolist() == ["last day high", "first day high", "middle medium", "last day low", "first day low"]
+    assert list(df.columns) == [*event_store.EVENT_COLUMNS, "RiskOrder"]
+    assert df["Date"].iloc[0] == date(2024, 5, 3)
+
+    high = event_store.query_events("2024-05-01", "2024-05-03", risks=["High"], path=path)
+    assert high["Title"].tolist() == ["last day high", "first day high"]
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from event_study import event_study
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(0)
+    idx = pd.bdate_range("2020-01-01", periods=400)
+    changes = pd.DataFrame(rng.normal(0, 0.01, (400, 3)), index=idx, columns=["GTI", "A", "B"])
+    events = pd.DataFrame({"Date": idx[rng.integers(80, 390, 40)], "Risk": rng.choice(["High", "Low"], 40)})
+    res = event_study(events, changes, pre=5, post=5, estimation=60)
+
+    for k, row in events.iterrows():
+        p = idx.get_loc(row["Date"])
+        normal = changes.iloc[p - 65:p - 5].mean()
+        expected = changes.iloc[p - 5:p + 6].sum() - normal * 11
+        got = res.abnormal.iloc[k][["GTI", "A", "B"]].astype(float)
+        np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), atol=1e-12)
+
+    summary = res.summary
+    assert summary.index.names == ["Risk", "series"]
+    high = res.abnormal[res.abnormal["Risk"] == "High"]["A"]
+    assert summary.loc[("High", "A"), "n"] == len(high)
+    assert np.isclose(summary.loc[("High", "A"), "mean"], high.mean())
+
+def test_missing_bars_do_not_count_as_normal_moves():
+    # تقويم كامل: أيام الأسبوع +0.01 والويك إند NaN (سوق مقفول) → مفيش حركة غير عادية
+    idx = pd.date_range("2021-01-01", periods=300, freq="D")
+    weekday = np.where(idx.dayofweek < 5, 0.01, np.nan)
+    changes = pd.DataFrame({"GTI": 0.01, "A": weekday}, index=idx)
+    events = pd.DataFrame({"Date": idx[[120, 150, 181, 200, 245]], "Risk": ["High", "Low", "High", "Low", "High"]})
+    res = event_study(events, changes, pre=3, post=4, estimation=40)
+
+    assert len(res.abnormal) == len(events)
+    np.testing.assert_allclose(res.abnormal[["GTI", "A"]].to_numpy(dtype=float), 0.0, atol=1e-12)
+    np.testing.assert_allclose(res.car.to_numpy(dtype=float), 0.0, atol=1e-12)
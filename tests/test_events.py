@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+import events
+from benchmarks.synthetic import FeedServer
+
+def test_feeds_are_cached_and_revalidated(monkeypatch):
+    monkeypatch.setattr(events, "_FEED_CACHE", {})
+    today = date.today()
+    with FeedServer(n_feeds=2, n_items=20) as server:
+        fetch = lambda: events.fetch_events(today - timedelta(days=30), today, feeds=server.urls)
+        first = fetch()
+        assert len(first)
+        assert len(server.requests) == 2
+
+        # جوه الـ TTL: مفيش طلبات خالص
+        fetch()
+        assert len(server.requests) == 2
+
+        # بعد الـ TTL: طلب مشروط بالـ ETag والنتيجة زي ما هي
+        for cached in events._FEED_CACHE.values():
+            cached["fetched_at"] -= events.FEED_TTL
+        again = fetch()
+        assert len(server.requests) == 4
+        assert all(etag for _, etag in server.requests[2:])
+        assert again.reset_index(drop=True).equals(first.reset_index(drop=True))
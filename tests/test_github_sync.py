@@ -0,0 +1,76 @@
+import pytest
+import github_sync
+from benchmarks.synthetic import ContentsAPIServer
+from github_sync import GitHubSync
+
+PATH = "stocks_weights.csv"
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(github_sync, "SYNC_BACKOFF", 0.0)
+
+def _sync(server, **kwargs):
+    return GitHubSync("token", "owner/repo", api_base=server.url, **kwargs)
+
+def _puts(server):
+    return [r for r in server.requests if r[0] == "PUT"]
+
+def test_rapid_edits_coalesce_into_one_commit():
+    with ContentsAPIServer({PATH: "v0\n"}) as server:
+        sync = _sync(server, delay=0.2)
+        for i in range(1, 6):
+            sync.submit(PATH, f"v{i}\n", f"edit {i}")
+        assert sync.status(PATH)["state"] == "pending"
+        assert sync.flush(10)
+        sync.close()
+    assert server.commits == [(PATH, "edit 5")]
+    assert server.files[PATH] == b"v5\n"
+    status = sync.status(PATH)
+    assert status["state"] == "ok" and "5 edit(s)" in status["message"]
+
+def test_server_errors_are_retried():
+    with ContentsAPIServer({PATH: "v0\n"}, fail_next=2) as server:
+        sync = _sync(server, delay=0.0)
+        sync.submit(PATH, "v1\n", "edit")
+        assert sync.flush(10)
+        sync.close()
+    assert server.fail_next == 0
+    assert server.files[PATH] == b"v1\n"
+    assert sync.status(PATH)["state"] == "ok"
+
+def test_stale_sha_is_refetched_after_409():
+    with ContentsAPIServer({PATH: "v0\n"}) as server:
+        sync = _sync(server, delay=0.0)
+        sync.submit(PATH, "v1\n", "first")
+        assert sync.flush(10)
+        server.files[PATH] = b"changed elsewhere\n"
+        sync.submit(PATH, "v2\n", "second")
+        assert sync.flush(10)
+        sync.close()
+    methods = [m for m, _ in server.requests]
+    assert methods == ["GET", "PUT", "PUT", "GET", "PUT"]
+    assert server.files[PATH] == b"v2\n"
+    assert [m for _, m in server.commits] == ["first", "second"]
+
+def test_unchanged_content_skips_the_commit():
+    with ContentsAPIServer({PATH: "same\n"}) as server:
+        sync = _sync(server, delay=0.0)
+        sync.submit(PATH, "same\n", "noop")
+        assert sync.flush(10)
+        sync.close()
+    assert _puts(server) == []
+    assert server.commits == []
+    assert sync.status(PATH)["message"].startswith("Already up to date")
+
+def test_same_content_is_pushed_again_after_remote_edit():
+    with ContentsAPIServer({PATH: "v0\n"}) as server:
+        sync = _sync(server, delay=0.0)
+        sync.submit(PATH, "backup\n", "first")
+        assert sync.flush(10)
+        server.files[PATH] = b"changed elsewhere\n"
+        sync.submit(PATH, "backup\n", "restore")
+        assert sync.flush(10)
+        sync.close()
+    assert server.files[PATH] == b"backup\n"
+    assert [m for _, m in server.commits] == ["first", "restore"]
+    assert sync.status(PATH)["message"].startswith("Committed")
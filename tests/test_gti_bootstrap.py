@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import SyntheticProvider
+from gti_bootstrap import bootstrap_bands
+
+def test_bands_are_deterministic_across_jobs_and_ordered():
+    provider = SyntheticProvider(n_tickers=6)
+    prices, weights = provider.prices(), provider.weights()
+    serial = bootstrap_bands(prices, weights, n_paths=300, batch_size=50, n_jobs=1, seed=7)
+    parallel = bootstrap_bands(prices, weights, n_paths=300, batch_size=50, n_jobs=2, seed=7)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert not serial.equals(bootstrap_bands(prices, weights, n_paths=300, batch_size=50, seed=8))
+
+    values = serial.to_numpy()
+    assert serial.columns[0] == "p5" and serial.columns[-1] == "p95"
+    assert (np.diff(values, axis=1) >= 0).all()
+    assert ((values >= 0) & (values <= 100)).all()
@@ -0,0 +1,47 @@
+import json
+import pandas as pd
+import pytest
+import gti_cli
+
+DF = pd.DataFrame({"Date": pd.to_datetime(["2024-01-02"]), "GTI": [42.0]})
+
+def test_stdout_honors_format(capsys):
+    gti_cli._write(DF, "-", "json")
+    assert json.loads(capsys.readouterr().out)[0]["GTI"] == 42.0
+    gti_cli._write(DF, "-")
+    assert capsys.readouterr().out.splitlines()[0] == "Date,GTI"
+
+def test_parquet_to_stdout_is_rejected():
+    with pytest.raises(SystemExit, match="stdout"):
+        gti_cli._write(DF, "-", "parquet")
+
+def test_state_is_rebuilt_when_weights_change(tmp_path, monkeypatch, capsys):
+    import numpy as np
+    import price_store
+    from benchmarks.synthetic import SyntheticProvider
+    from gti_engine import GTIAccumulator, compute_gti
+
+    provider = SyntheticProvider(n_tickers=4)
+    prices = provider.prices()
+    monkeypatch.setattr(price_store, "load_close", lambda tickers, start, end, **kw: prices.loc[str(start):str(end)])
+    weights, state = tmp_path / "w.csv", tmp_path / "state.json"
+    args = ["gti", "--weights", str(weights), "--state", str(state),
+            "--start", "2024-01-01", "--end", "2024-12-31", "--out", str(tmp_path / "gti.csv")]
+
+    provider.weights().to_csv(weights, index=False)
+    gti_cli.main(args)
+    changed = provider.weights().assign(weight=[1.0, 2.0, 3.0, 4.0])
+    changed.to_csv(weights, index=False)
+    gti_cli.main(args)
+
+    assert "rebuilding" in capsys.readouterr().err
+    acc = GTIAccumulator.load(str(state))
+    expected = compute_gti(prices.loc["2024-01-01":"2024-12-31"], changed)
+    np.testing.assert_allclose(acc.raw_series().to_numpy(), expected.raw.to_numpy())
+
+def test_parquet_without_engine_exits_cleanly(tmp_path, monkeypatch):
+    def no_engine(*args, **kwargs):
+        raise ImportError("Unable to find a usable engine")
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", no_engine)
+    with pytest.raises(SystemExit, match="pyarrow"):
+        gti_cli._write(DF, str(tmp_path / "gti.parquet"))
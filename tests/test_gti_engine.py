@@ -0,0 +1,90 @@
+import json
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import SyntheticProvider
+from gti_engine import GTIAccumulator, compute_gti
+
+def _data(n=8, years=2):
+    provider = SyntheticProvider(n_tickers=n, years=years)
+    prices = provider.prices()
+    prices.iloc[::7, 1] = np.nan
+    return prices, provider.weights()
+
+# ---------- GTIAccumulator ----------
+def test_chunked_updates_with_round_trip_match_compute_gti():
+    prices, weights = _data()
+    acc = GTIAccumulator.from_prices(prices.iloc[:100], weights)
+    for lo in range(100, len(prices), 37):
+        acc = GTIAccumulator.from_dict(json.loads(json.dumps(acc.to_dict())))
+        acc.update(prices.iloc[lo:lo + 37])
+    gti = compute_gti(prices, weights)
+    np.testing.assert_allclose(acc.raw_series().to_numpy(), gti.raw.to_numpy(), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(acc.normalized_series().to_numpy(), gti.normalized.to_numpy(), rtol=0, atol=1e-9)
+    assert acc.raw_series().index.equals(gti.raw.index)
+
+def test_renormalized_flag_on_new_extreme():
+    idx = pd.bdate_range("2024-01-01", periods=5)
+    weights = pd.DataFrame({"symbol": ["A"], "weight": [1.0], "positive": [1]})
+    acc = GTIAccumulator.from_prices(pd.DataFrame({"A": [100.0, 101, 102, 101, 101.5]}, index=idx), weights)
+    more = pd.bdate_range("2024-01-08", periods=2)
+    acc.update(pd.DataFrame({"A": [101.6, 101.2]}, index=more))
+    assert not acc.renormalized
+    acc.update(pd.DataFrame({"A": [120.0]}, index=pd.bdate_range("2024-01-10", periods=1)))
+    assert acc.renormalized
+    assert acc.value == 100.0
+
+def test_state_with_nan_last_prices_loads(tmp_path):
+    prices, weights = _data()
+    prices.iloc[-1, 0] = np.nan
+    acc = GTIAccumulator.from_prices(prices, weights)
+    path = tmp_path / "state.json"
+    acc.save(str(path))
+    loaded = GTIAccumulator.load(str(path))
+    assert np.isnan(loaded.last_prices[0])
+    np.testing.assert_array_equal(np.isnan(loaded.last_prices), np.isnan(acc.last_prices))
+    assert loaded.raw == acc.raw and loaded.last_date == acc.last_date
+
+def test_matches_detects_changed_weights():
+    prices, weights = _data()
+    acc = GTIAccumulator.from_prices(prices, weights)
+    assert acc.matches(weights, acc.symbols)
+    changed = weights.assign(weight=weights["weight"] + np.arange(len(weights)))
+    assert not acc.matches(changed, acc.symbols)
+    assert not acc.matches(weights, acc.symbols + ["NEW"])
+
+# ---------- Rolling Normalization ----------
+def _raw_series(seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2021-01-01", "2024-12-31")
+    dates = dates[rng.random(len(dates)) > 0.15]        # إجازات وفجوات غير منتظمة
+    raw = pd.Series(np.cumsum(rng.normal(0, 0.01, len(dates))), index=dates)
+    raw.iloc[rng.integers(0, len(raw), 20)] = np.nan
+    return raw
+
+def test_rolling_minmax_matches_pandas():
+    from gti_engine import NORMALIZATION_WINDOWS, rolling_minmax
+    raw = _raw_series()
+    out = rolling_minmax(raw.to_numpy(), raw.index, NORMALIZATION_WINDOWS)
+    ok = raw.notna().to_numpy()
+    for name, days in NORMALIZATION_WINDOWS.items():
+        roll = raw.expanding() if days is None else raw.rolling(f"{days}D")
+        lo, hi = out[name]
+        np.testing.assert_array_equal(lo[ok], roll.min().to_numpy()[ok], err_msg=name)
+        np.testing.assert_array_equal(hi[ok], roll.max().to_numpy()[ok], err_msg=name)
+        assert np.isnan(lo[~ok]).all()
+
+def test_normalize_windows_trims_lookback():
+    from gti_engine import NORMALIZATION_WINDOWS, normalization_lookback, normalize_windows, normalize_minmax
+    raw = _raw_series(1).dropna()
+    start = pd.Timestamp("2023-06-01")
+    assert normalization_lookback() == 365
+    table = normalize_windows(raw, start=start)
+    assert table.index[0] >= start and table.index.equals(raw.index[raw.index >= start])
+    assert list(table.columns) == [*NORMALIZATION_WINDOWS, "full"]
+
+    lo, hi = raw.rolling("90D").min(), raw.rolling("90D").max()
+    expected = ((raw - lo) / (hi - lo) * 100)[raw.index >= start]
+    np.testing.assert_allclose(table["90d"].to_numpy(), expected.to_numpy())
+    # expanding بيشوف الـ lookback كله، و full بيشوف المدى المعروض بس
+    np.testing.assert_allclose(table["full"].to_numpy(), normalize_minmax(raw[raw.index >= start]).to_numpy())
+    assert ((table.drop(columns="full") >= 0) & (table.drop(columns="full") <= 100)).all().all()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from gti_stream import StreamingGTI, new_bars
+
+def _minutes(n=390):
+    return pd.date_range("2024-12-02 14:30", periods=n, freq="min", tz="UTC")
+
+def test_new_bars_are_merged_in_time_order():
+    idx = _minutes(3)
+    close = pd.DataFrame({"A": [1.0, 2.0, 3.0], "B": [10.0, np.nan, 30.0]}, index=idx)
+    seen = {}
+    assert new_bars(close, seen) == [
+        (idx[0], "A", 1.0), (idx[0], "B", 10.0), (idx[1], "A", 2.0), (idx[2], "A", 3.0), (idx[2], "B", 30.0),
+    ]
+    assert new_bars(close, seen) == []
+    more = pd.DataFrame({"A": [3.0, 4.0], "B": [30.0, 40.0]}, index=[idx[2], idx[2] + pd.Timedelta(minutes=1)])
+    assert [b[1:] for b in new_bars(more, seen)] == [("A", 4.0), ("B", 40.0)]
+
+def test_one_index_point_per_minute_across_symbols():
+    idx = _minutes()
+    rng = np.random.default_rng(0)
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.001, (len(idx), 2)), axis=0)), index=idx, columns=["A", "B"])
+    stream = StreamingGTI(["A", "B"], np.array([0.5, -0.5]), base_prices=[100.0, 100.0])
+    for bar in new_bars(close, {}):
+        stream.on_tick(*bar)
+    assert stream.gti_pos == len(idx)
+    raw = close.iloc[-1].to_numpy() / 100 - 1
+    assert np.isclose(stream.snapshot()["raw"], 0.5 * raw[0] - 0.5 * raw[1])
+    assert stream.history().index.equals(pd.DatetimeIndex(idx.tz_localize(None)))
+
+def test_session_date_uses_exchange_time():
+    from datetime import datetime, timezone
+    from gti_stream import session_date
+    # 02:00 UTC لسه يوم 2 في نيويورك
+    assert str(session_date(datetime(2024, 12, 3, 2, 0, tzinfo=timezone.utc))) == "2024-12-02"
+
+def test_bars_from_another_session_are_dropped():
+    from datetime import date
+    # 2024-12-02 في نيويورك: 14:30 UTC. آخر شمعة من جلسة 29 نوفمبر
+    idx = pd.DatetimeIndex(["2024-11-29 20:59", "2024-12-02 14:30", "2024-12-02 14:31"], tz="UTC")
+    close = pd.DataFrame({"A": [1.0, 2.0, 3.0]}, index=idx)
+    bars = new_bars(close, {}, day=date(2024, 12, 2))
+    assert [b[2] for b in bars] == [2.0, 3.0]
+    ny = close.tz_convert("America/New_York")
+    assert [b[2] for b in new_bars(ny, {}, day=date(2024, 11, 29))] == [1.0]
+
+def test_replay_source_drives_the_stream(tmp_path):
+    from gti_stream import ReplaySource
+    path = tmp_path / "ticks.csv"
+    rows = ["ts,symbol,price"]
+    idx = _minutes(5)
+    for k, ts in enumerate(idx):
+        rows += [f"{ts.isoformat()},A,{100 + k}", f"{ts.isoformat()},B,{50 - k}", f"{ts.isoformat()},ZZZ,1"]
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    stream = StreamingGTI(["A", "B"], np.array([0.5, -0.5]), base_prices=[100.0, 50.0], buffer_size=3)
+    stream.start(ReplaySource(str(path)))
+    stream._thread.join(5)
+    snap = stream.snapshot()
+    assert not snap["running"] and snap["error"] is None
+    assert snap["ticks"] == 10 and snap["symbols_live"] == 2
+    assert np.isclose(snap["raw"], 0.5 * 4 / 100 - 0.5 * (-4 / 50))
+    assert len(stream.history()) == 3                       # ring buffer ثابت الطول
+    a = stream.symbol_history("A")
+    assert a.tolist() == [102.0, 103.0, 104.0]
+    assert a.index.equals(pd.DatetimeIndex(idx[-3:].tz_localize(None)))
+
+def test_yahoo_polling_pauses_while_nobody_reads():
+    import threading
+    from gti_stream import YahooMinuteSource
+    idx = _minutes(2)
+
+    class Source(YahooMinuteSource):
+        def _download(self):
+            return pd.DataFrame({"A": [100.0, 101.0]}, index=idx)
+
+    stream = StreamingGTI(["A"], np.array([1.0]), base_prices=[100.0])
+    source = Source(["A"], poll=0.01, day=idx[0].date(), active=lambda: stream.active(idle=0.05))
+    stream.start(source)
+    threading.Event().wait(0.3)
+    paused = source.polls
+    threading.Event().wait(0.2)
+    assert 0 < paused == source.polls                      # مفيش قراءة → مفيش طلبات
+    stream.snapshot()
+    threading.Event().wait(0.1)
+    assert source.polls > paused
+    stream.stop()
+    stream._thread.join(1)
+    assert stream.ticks == 2                               # seen محفوظ: مفيش شموع مكررة
@@ -0,0 +1,126 @@
+import json
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+import index_analysis
+import price_store
+from benchmarks.synthetic import SyntheticProvider
+
+START, END = "2024-06-01", "2024-12-01"
+
+@pytest.fixture
+def provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_store, "STORE_FILE", str(tmp_path / "prices.sqlite"))
+    monkeypatch.setattr(index_analysis, "FETCH_BACKOFF", 0.0)
+    index_analysis.clear_results_cache()
+    return SyntheticProvider(n_tickers=3, years=3)
+
+def _markets(tmp_path, provider) -> str:
+    path = tmp_path / "markets.json"
+    path.write_text(json.dumps(provider.markets()), encoding="utf-8")
+    return str(path)
+
+def test_batch_hit_uses_one_request(provider):
+    closes = index_analysis.download_closes(provider.tickers, START, END, fetcher=provider.fetch)
+    assert len(provider.calls) == 1
+    assert set(provider.calls[0][0]) == set(provider.tickers)
+    assert all(not closes[t].empty for t in provider.tickers)
+
+def test_batch_miss_falls_back_with_retry(provider):
+    flaky = provider.tickers[1]
+    attempts = []
+
+    def fetcher(tickers, start, end):
+        # بيتشال من الطلب المجمّع، وأول محاولة فردية بتفشل، والتانية بتنجح
+        if len(tickers) == 1 and tickers[0] == flaky:
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ConnectionError("temporary")
+        return provider.fetch([t for t in tickers if len(tickers) == 1 or t != flaky], start, end)
+
+    closes = index_analysis.download_closes(provider.tickers, START, END, fetcher=fetcher)
+    assert len(attempts) == 2
+    assert all(not closes[t].empty for t in provider.tickers)
+
+def test_timed_out_ticker_is_not_found(provider, tmp_path, monkeypatch):
+    monkeypatch.setattr(index_analysis, "FETCH_TIMEOUT", 0.2)
+    slow = provider.tickers[2]
+    release = threading.Event()
+
+    def fetcher(tickers, start, end):
+        if list(tickers) == [slow]:
+            release.wait(5)
+        return provider.fetch([t for t in tickers if t != slow], start, end)
+
+    try:
+        df = index_analysis.build_results(START, END, markets_path=_markets(tmp_path, provider), fetcher=fetcher)
+    finally:
+        release.set()
+    status = df.set_index("YahooTicker")["status"]
+    assert status[slow] == "❌ Not Found"
+    assert (status.drop(slow) == "✅ OK").all()
+
+def test_vectorized_returns_match_per_ticker_logic():
+    rng = np.random.default_rng(1)
+    closes = {}
+    # كل تيكر ليه تقويم مختلف (ويك إند مختلف، إجازات، بداية متأخرة)
+    for i, freq in enumerate(["B", "C", "W-SUN", "B", "B"]):
+        dates = pd.date_range("2023-01-01", "2024-12-31", freq=freq)
+        dates = dates[rng.random(len(dates)) > 0.1][i * 20:]
+        closes[f"T{i}"] = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates)))), index=dates)
+    closes["T1"].iloc[[50, 51, 300]] = 0.0      # أسعار صفر
+    closes["EMPTY"] = pd.Series(dtype="float64")
+    zero = closes["T1"].index[51]
+    asof = pd.to_datetime(["2022-06-01", "2023-01-02", "2023-03-15", "2024-02-29", "2024-06-16", "2024-12-31", "2025-03-01"])
+    asof = asof.append(pd.DatetimeIndex([zero, zero + pd.Timedelta(days=7), zero + pd.Timedelta(days=30)]))
+
+    panel = index_analysis.build_close_panel(closes)
+    changes = index_analysis.asof_returns(panel, asof)
+    rows = []
+    for k, day in enumerate(asof):
+        for j, (t, s) in enumerate(closes.items()):
+            expected = {
+                "daily": index_analysis._pct_change_daily(s, day),
+                **{name: index_analysis._pct_change_over(s, days, day) for name, days in index_analysis.HORIZONS.items()},
+            }
+            for col, value in expected.items():
+                np.testing.assert_equal(changes[col][k, j], np.nan if value is None else value, err_msg=f"{t} {day} {col}")
+            rows.append({**expected, "vec": {col: changes[col][k, j] for col in expected}})
+
+    ref = pd.DataFrame([{c: r[c] for c in index_analysis.RETURN_COLUMNS} for r in rows])
+    vec = pd.DataFrame([r["vec"] for r in rows])
+    expected_colors = ref.apply(index_analysis.classify_color_class, axis=1)
+    assert (index_analysis.attach_color_classes(vec)["ColorClass"] == expected_colors).all()
+    assert expected_colors.nunique() > 1
+    k = len(asof) - 3
+    assert np.isnan(changes["daily"][k, 1]) and np.isnan(changes["weekly"][k + 1, 1])
+
+# ---------- Results Cache ----------
+def test_results_cache_expires_after_ttl():
+    import time
+    index_analysis.clear_results_cache()
+    calls = []
+    build = lambda: calls.append(1) or len(calls)
+    assert index_analysis._cached(("ttl",), build, ttl=0.05) == (1, False)
+    assert index_analysis._cached(("ttl",), build, ttl=0.05) == (1, True)
+    time.sleep(0.06)
+    assert index_analysis._cached(("ttl",), build, ttl=0.05) == (2, False)
+
+def test_results_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(index_analysis, "RESULTS_CACHE_SIZE", 3)
+    index_analysis.clear_results_cache()
+    for k in "abc":
+        index_analysis._cached((k,), lambda k=k: k)
+    index_analysis._cached(("a",), lambda: "rebuilt")   # a بقى الأحدث استخدامًا
+    index_analysis._cached(("d",), lambda: "d")
+    assert list(index_analysis._RESULTS_CACHE) == [("c",), ("a",), ("d",)]
+    assert index_analysis._cached(("b",), lambda: "rebuilt") == ("rebuilt", False)
+
+def test_editing_markets_file_changes_the_key(tmp_path):
+    path = tmp_path / "markets.json"
+    path.write_text(json.dumps([{"Country": "USA", "YahooTicker": "^GSPC"}]), encoding="utf-8")
+    key = index_analysis._cache_key("results", START, END, END, str(path), None)
+    assert key == index_analysis._cache_key("results", START, END, END, str(path), None)
+    path.write_text(json.dumps([{"Country": "USA", "YahooTicker": "^DJI"}]), encoding="utf-8")
+    assert key != index_analysis._cache_key("results", START, END, END, str(path), None)
@@ -0,0 +1,18 @@
+import pandas as pd
+from benchmarks.bench_keywords import _baseline, synthetic_titles
+from events import DEFAULT_KEYWORDS, RISK_KEYWORDS
+from keyword_matcher import KeywordMatcher
+
+def test_scan_and_scan_many_match_substring_baseline():
+    titles = synthetic_titles(5000) + ["", "WARFARE and Trade-war", "Attacks on policy", "sanction"]
+    expected = _baseline(titles, DEFAULT_KEYWORDS)
+    matcher = KeywordMatcher(DEFAULT_KEYWORDS, RISK_KEYWORDS)
+    assert [matcher.scan(t) for t in titles] == expected
+    batch = matcher.scan_many(pd.Series(titles, index=range(10, 10 + len(titles))))
+    assert list(zip(batch["match"], batch["Risk"])) == expected
+    assert batch.index[0] == 10
+
+def test_empty_keyword_matches_everything():
+    matcher = KeywordMatcher(["", "war"], {"High": ["war"]})
+    assert matcher.scan("quiet day") == (True, "Low")
+    assert matcher.scan_many(["quiet day", "war"]).values.tolist() == [[True, "Low"], [True, "High"]]
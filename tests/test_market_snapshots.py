@@ -0,0 +1,59 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import index_analysis
+import market_snapshots
+import price_store
+from benchmarks.synthetic import SyntheticProvider
+from market_snapshots import ensure_snapshots, query_snapshots
+
+START, END = "2024-10-01", "2024-11-30"
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_store, "STORE_FILE", str(tmp_path / "prices.sqlite"))
+    monkeypatch.setattr(index_analysis, "FETCH_BACKOFF", 0.0)
+    monkeypatch.setattr(market_snapshots, "_RECHECKED", {})
+    index_analysis.clear_results_cache()
+    provider = SyntheticProvider(n_tickers=4, years=3)
+    markets = tmp_path / "markets.json"
+    markets.write_text(json.dumps(provider.markets()), encoding="utf-8")
+    return provider, str(markets), str(tmp_path / "snapshots.sqlite")
+
+def _expected(day, markets, fetcher):
+    df = index_analysis.attach_color_classes(index_analysis.build_results(START, END, day, markets_path=markets, fetcher=fetcher))
+    return df.set_index("YahooTicker")
+
+def test_snapshots_match_build_results(env):
+    provider, markets, path = env
+    ensure_snapshots(START, END, markets, fetcher=provider.fetch, path=path)
+    snap = query_snapshots(START, END, markets, path)
+    for day in ["2024-10-01", "2024-10-19", "2024-11-30"]:
+        got = snap[snap["Date"] == day].set_index("YahooTicker")
+        exp = _expected(day, markets, provider.fetch)
+        assert (got["status"] == exp["status"]).all()
+        assert (got["ColorClass"] == exp["ColorClass"]).all()
+        np.testing.assert_allclose(got[index_analysis.RETURN_COLUMNS], exp[index_analysis.RETURN_COLUMNS])
+
+def test_failed_ticker_is_recomputed_after_recovery(env, monkeypatch):
+    provider, markets, path = env
+    flaky = provider.tickers[2]
+    down = {"flag": True}
+
+    def fetcher(tickers, start, end):
+        return provider.fetch([t for t in tickers if not (down["flag"] and t == flaky)], start, end)
+
+    ensure_snapshots(START, END, markets, fetcher=fetcher, path=path)
+    row = lambda: query_snapshots("2024-11-15", "2024-11-15", markets, path).set_index("YahooTicker").loc[flaky]
+    assert row()["status"] == "❌ Not Found"
+
+    down["flag"] = False
+    ensure_snapshots(START, END, markets, fetcher=fetcher, path=path)
+    assert row()["status"] == "❌ Not Found"   # لسه جوه SNAPSHOT_RECHECK
+
+    monkeypatch.setattr(market_snapshots, "SNAPSHOT_RECHECK", 0)
+    ensure_snapshots(START, END, markets, fetcher=fetcher, path=path)
+    exp = _expected("2024-11-15", markets, provider.fetch).loc[flaky]
+    assert row()["status"] == "✅ OK" == exp["status"]
+    assert np.isclose(row()["daily"], exp["daily"])
@@ -0,0 +1,65 @@
+import threading
+import time
+import pandas as pd
+import price_cache
+from benchmarks.synthetic import SyntheticProvider
+from price_cache import SharedPriceCache
+
+def _cache(tmp_path, fetcher):
+    cache = SharedPriceCache(history_days=365, fetcher=fetcher, store_path=str(tmp_path / "prices.sqlite"))
+    cache.start = pd.Timestamp("2024-01-01")
+    cache._window_end = lambda: pd.Timestamp("2025-01-01")
+    return cache
+
+def test_concurrent_requests_share_one_fetch(tmp_path):
+    provider = SyntheticProvider(n_tickers=4)
+    cache = _cache(tmp_path, provider.fetch)
+    barrier = threading.Barrier(8)
+
+    def get():
+        barrier.wait()
+        cache.get(provider.tickers, "2024-06-01", "2024-07-01")
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(provider.calls) == 1
+
+def test_failed_ticker_is_retried_after_ttl(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_cache, "FAILED_TTL", 0.05)
+    provider = SyntheticProvider(n_tickers=2)
+    flaky = provider.tickers[1]
+    down = {"flag": True}
+
+    def fetcher(tickers, start, end):
+        return provider.fetch([t for t in tickers if not (down["flag"] and t == flaky)], start, end)
+
+    cache = _cache(tmp_path, fetcher)
+    first = cache.get(provider.tickers, "2024-06-01", "2024-07-01")
+    assert first[flaky].isna().all()
+
+    down["flag"] = False
+    time.sleep(0.06)
+    second = cache.get(provider.tickers, "2024-06-01", "2024-07-01")
+    assert second[flaky].notna().all()
+    assert second[provider.tickers[0]].equals(first[provider.tickers[0]])
+
+def test_failed_ticker_is_not_refetched_within_ttl(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_cache, "FAILED_TTL", 60)
+    provider = SyntheticProvider(n_tickers=2)
+    dead = provider.tickers[1]
+    requested = []
+
+    def fetcher(tickers, start, end):
+        requested.append(list(tickers))
+        return provider.fetch([t for t in tickers if t != dead], start, end)
+
+    cache = _cache(tmp_path, fetcher)
+    for _ in range(3):
+        out = cache.get(provider.tickers, "2024-06-01", "2024-07-01")
+        assert out[dead].isna().all() and out[provider.tickers[0]].notna().all()
+    assert [dead in r for r in requested] == [True]
+
+    cache.refresh(provider.tickers)          # الـ refresher بيتجاهل الـ TTL
+    assert dead in requested[-1]
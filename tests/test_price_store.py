@@ -0,0 +1,32 @@
+import pandas as pd
+import price_store
+from benchmarks.synthetic import SyntheticProvider
+
+def test_second_load_reads_from_store(tmp_path):
+    provider = SyntheticProvider(n_tickers=3, years=2)
+    path = str(tmp_path / "prices.sqlite")
+    first = price_store.load_close(provider.tickers, "2024-01-01", "2024-07-01", fetcher=provider.fetch, path=path)
+    calls = len(provider.calls)
+    again = price_store.load_close(provider.tickers, "2024-02-01", "2024-06-01", fetcher=provider.fetch, path=path)
+    assert len(provider.calls) == calls
+    pd.testing.assert_frame_equal(again, first.loc["2024-02-01":"2024-05-31"])
+
+def test_disjoint_concurrent_loads_keep_gap_uncovered(tmp_path):
+    provider = SyntheticProvider(n_tickers=1, years=3)
+    path = str(tmp_path / "prices.sqlite")
+    t = provider.tickers[0]
+
+    def fetcher(tickers, start, end):
+        # بيحاكي session تانية بتكمّل تحميل مدى منفصل وإحنا لسه برا الـ lock
+        if not fetcher.nested:
+            fetcher.nested = True
+            price_store.load_close(tickers, "2023-06-01", "2023-07-01", fetcher=provider.fetch, path=path)
+        return provider.fetch(tickers, start, end)
+    fetcher.nested = False
+
+    price_store.load_close([t], "2022-01-01", "2022-02-01", fetcher=fetcher, path=path)
+    calls = len(provider.calls)
+    middle = price_store.load_close([t], "2022-03-01", "2023-05-01", fetcher=provider.fetch, path=path)
+    assert len(provider.calls) > calls
+    expected = provider.fetch([t], "2022-03-01", "2023-05-01")
+    assert len(middle) == len(expected)
@@ -0,0 +1,46 @@
+import threading
+import pytest
+import telemetry
+
+@pytest.fixture(autouse=True)
+def disabled(monkeypatch):
+    monkeypatch.setattr(telemetry, "ENABLED", False)
+    monkeypatch.setattr(telemetry, "_TOTALS", {})
+
+def _session(name, debug, barrier, out):
+    telemetry.start_run()
+    telemetry.enable(debug)
+    barrier.wait()
+    with telemetry.span(name):
+        pass
+    barrier.wait()
+    out[name] = telemetry.current_run()
+
+def test_runs_are_isolated_per_session():
+    barrier, out = threading.Barrier(2), {}
+    threads = [threading.Thread(target=_session, args=(n, d, barrier, out)) for n, d in (("a", True), ("b", False))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [s["stage"] for s in out["a"]] == ["a"]
+    assert out["b"] == []
+    assert not telemetry.ENABLED
+    assert set(telemetry._TOTALS) == {"a"}
+
+def test_background_spans_only_reach_totals(monkeypatch):
+    telemetry.start_run(enabled=True)
+    monkeypatch.setattr(telemetry, "ENABLED", True)
+    t = threading.Thread(target=lambda: telemetry.span("refresh").__enter__().__exit__())
+    t.start()
+    t.join()
+    assert telemetry.current_run() == []
+    assert telemetry._TOTALS["refresh"]["calls"] == 1
+
+def test_bind_records_pool_spans_into_the_run():
+    telemetry.start_run(enabled=True)
+    work = telemetry.bind(lambda: telemetry.span("worker").__enter__().__exit__())
+    t = threading.Thread(target=work)
+    t.start()
+    t.join()
+    assert [s["stage"] for s in telemetry.current_run()] == ["worker"]